@@ -15,6 +15,7 @@ from typing import List, Tuple
 
 from board_base import (
     board_array_size,
+    point_to_rc_table,
     coord_to_point,
     is_black_white,
     is_black_white_empty,
@@ -29,6 +30,7 @@ from board_base import (
     PASS,
     GO_COLOR,
     GO_POINT,
+    BOARD_DTYPE,
 )
 
 
@@ -56,13 +58,19 @@ class GoBoard(object):
         self.size: int = size
         self.NS: int = size + 1
         self.WE: int = 1
+        NS = self.NS
+        # the 8 capture directions, built once per board size
+        self._dirs: Tuple[int, ...] = (1, -1, NS, -NS, NS + 1, -(NS + 1), NS - 1, -(NS - 1))
+        self._point_to_rc: Tuple[Tuple[int, int], ...] = point_to_rc_table(size)
         self.ko_recapture: GO_POINT = None
         self.last_move: GO_POINT = None
         self.last2_move: GO_POINT = None
         self.current_player: GO_COLOR = BLACK
         self.maxpoint: int = board_array_size(size)
-        self.board: np.ndarray[GO_POINT] = np.full(self.maxpoint, BORDER, dtype=GO_POINT)
+        self.board: np.ndarray[GO_COLOR] = np.full(self.maxpoint, BORDER, dtype=BOARD_DTYPE)
         self._initialize_empty_points(self.board)
+        self._vacant: set = set(self.get_empty_points().tolist())
+        self._legal_cache: dict = {}
 
     def copy(self) -> 'GoBoard':
         b = GoBoard(self.size)
@@ -74,8 +82,18 @@ class GoBoard(object):
         b.current_player = self.current_player
         assert b.maxpoint == self.maxpoint
         b.board = np.copy(self.board)
+        b._vacant = set(self._vacant)
         return b
 
+    def point_to_coord(self, point: GO_POINT) -> Tuple[int, int]:
+        """
+        Transform point to (row, col) with a table lookup instead of divmod.
+        Special case: PASS is transformed to (PASS,PASS)
+        """
+        if point == PASS:
+            return (PASS, PASS)
+        return self._point_to_rc[point]
+
     def get_color(self, point: GO_POINT) -> GO_COLOR:
         return self.board[point]
 
@@ -105,15 +123,32 @@ class GoBoard(object):
 
     def is_legal(self, point: GO_POINT, color: GO_COLOR) -> bool:
         """
-        Check whether it is legal for color to play on point
-        This method tries to play the move on a temporary copy of the board.
-        This prevents the board from being modified by the move
+        Check whether it is legal for color to play on point.
+        In Ninuki every empty point is legal, so this only checks
+        that point is empty.
         """
         if point == PASS:
             return True
-        board_copy: GoBoard = self.copy()
-        can_play_move = board_copy.play_move(point, color)
-        return can_play_move
+        return self.board[point] == EMPTY
+
+    def legal_moves(self, color: GO_COLOR) -> List[GO_POINT]:
+        """
+        Sorted list of the legal moves of color, not including PASS.
+        Cached until the board changes; do not modify the returned list.
+        """
+        moves = self._legal_cache.get(color)
+        if moves is None:
+            moves = sorted(self._vacant)
+            self._legal_cache[color] = moves
+        return moves
+
+    def remove_stones(self, points: List[GO_POINT]) -> None:
+        """
+        Remove the stones on points, e.g. after a capture
+        """
+        self.board[points] = EMPTY
+        self._vacant.update(points)
+        self._legal_cache.clear()
 
     def end_of_game(self) -> bool:
         return self.last_move == PASS \
@@ -236,6 +271,8 @@ class GoBoard(object):
             return False
         
         self.board[point] = color
+        self._vacant.discard(point)
+        self._legal_cache.clear()
         self.current_player = opponent(color)
         self.last2_move = self.last_move
         self.last_move = point
@@ -301,7 +338,8 @@ class GoBoard(object):
         return False
 
     def result(self):
-        if len(self.get_empty_points()) == self.size*self.size:
+        num_empty = len(self._vacant)
+        if num_empty == self.size*self.size:
             return "unkown"
         color = opponent(self.current_player)
         if self.win(self.last_move, color):
@@ -310,7 +348,7 @@ class GoBoard(object):
             if color == WHITE:
                 return "white"
         
-        if len(self.get_empty_points()) == 0:
+        if num_empty == 0:
             return "draw"
         
         return "unknown"
@@ -10,7 +10,6 @@ at the University of Edinburgh.
 """
 import traceback
 import numpy as np
-import re
 from sys import stdin, stdout, stderr
 from typing import Any, Callable, Dict, List, Tuple
 from random import choice
@@ -30,6 +29,11 @@ from board import GoBoard
 from board_util import GoBoardUtil
 from engine import GoEngine
 
+"""
+Translation table from board colors to the characters of gogui-rules_board
+"""
+BOARD_CHARS = bytes.maketrans(bytes([BLACK, WHITE, EMPTY, BORDER]), b"XO.\n")
+
 class GtpConnection:
     def __init__(self, go_engine: GoEngine, board: GoBoard, debug_mode: bool = False) -> None:
         """
@@ -94,6 +98,9 @@ class GtpConnection:
         Start a GTP connection. 
         This function continuously monitors standard input for commands.
         """
+        # with line buffering every complete response line is flushed
+        # by the stream itself, so respond and error need no flush
+        stdout.reconfigure(line_buffering=True, write_through=True)
         line = stdin.readline()
         while line:
             self.get_cmd(line)
@@ -109,7 +116,11 @@ class GtpConnection:
             return
         # Strip leading numbers from regression tests
         if command[0].isdigit():
-            command = re.sub("^\d+", "", command).lstrip()
+            i = 1
+            n = len(command)
+            while i < n and command[i].isdigit():
+                i += 1
+            command = command[i:].lstrip()
 
         elements: List[str] = command.split()
         if not elements:
@@ -128,7 +139,6 @@ class GtpConnection:
         else:
             self.debug_msg("Unknown command: {}\n".format(command_name))
             self.error("Unknown command")
-            stdout.flush()
 
     def has_arg_error(self, cmd: str, argnum: int) -> bool:
         """
@@ -149,12 +159,10 @@ class GtpConnection:
     def error(self, error_msg: str) -> None:
         """ Send error msg to stdout """
         stdout.write("? {}\n\n".format(error_msg))
-        stdout.flush()
 
     def respond(self, response: str = "") -> None:
         """ Send response to stdout """
         stdout.write("= {}\n\n".format(response))
-        stdout.flush()
 
     def reset(self, size: int) -> None:
         """
@@ -172,6 +180,7 @@ class GtpConnection:
     def quit_cmd(self, args: List[str]) -> None:
         """ Quit game and exit the GTP interface """
         self.respond()
+        stdout.flush()
         exit()
 
     def name_cmd(self, args: List[str]) -> None:
@@ -225,13 +234,10 @@ class GtpConnection:
         """
         board_color: str = args[0].lower()
         color: GO_COLOR = color_to_int(board_color)
-        moves: List[GO_POINT] = GoBoardUtil.generate_legal_moves(self.board, color)
-        gtp_moves: List[str] = []
-        for move in moves:
-            coords: Tuple[int, int] = point_to_coord(move, self.board.size)
-            gtp_moves.append(format_point(coords))
-        sorted_moves = " ".join(sorted(gtp_moves))
-        self.respond(sorted_moves)
+        moves: List[GO_POINT] = self.board.legal_moves(color)
+        gtp_moves: List[str] = [format_point(self.board.point_to_coord(move))
+                                for move in sort_points(moves, self.board.size)]
+        self.respond(" ".join(gtp_moves))
 
     """
     ==========================================================================
@@ -269,22 +275,12 @@ class GtpConnection:
     def gogui_rules_board_cmd(self, args: List[str]) -> None:
         """ We already implemented this function for Assignment 1 """
         size = self.board.size
-        str = ''
-        for row in range(size-1, -1, -1):
-            start = self.board.row_start(row + 1)
-            for i in range(size):
-                #str += '.'
-                point = self.board.board[start + i]
-                if point == BLACK:
-                    str += 'X'
-                elif point == WHITE:
-                    str += 'O'
-                elif point == EMPTY:
-                    str += '.'
-                else:
-                    assert False
-            str += '\n'
-        self.respond(str)
+        NS = self.board.NS
+        # each row of size points is followed by the BORDER point
+        # that pads the next row, which is translated to the newline
+        rows = self.board.board[NS + 1 : (size + 1) * NS + 1].reshape(size, NS)
+        text = rows[::-1].tobytes().translate(BOARD_CHARS)
+        self.respond(text.decode("ascii"))
 
     """
     ==========================================================================
@@ -298,39 +294,6 @@ class GtpConnection:
         else:
             return False
         
-    def __wrongCoordErr(self, args):
-        move = str(args[1]).lower()
-        if len(move) < 2:
-            return True
-        
-        char_col = args[1][0].lower()
-        row = args[1][1:]
-
-        try:
-            if (not "a" <= char_col <= "z") or char_col == "i":
-                return True
-            
-            col = ord(char_col) - ord("a")
-            if char_col < "i":
-                col += 1
-
-            row = int(row)
-            if row < 1:
-                return True
-        except(IndexError, ValueError):
-            return True
-
-        if not (col <= self.board.size and row <= self.board.size):
-            return True
-
-        return row, col
-    
-    def __occupiedErr(self, move):
-        if move in self.board.get_empty_points():
-            return False
-        else:
-            return True
-        
     def gogui_rules_final_result_cmd(self, args: List[str]) -> None:
         """ Implement this function for Assignment 1 """
         if self.white_score >= 10:
@@ -353,13 +316,9 @@ class GtpConnection:
             self.respond()
             return
         
-        emptyPoints = self.board.get_empty_points()
-        legalMoves = []
-        for point in emptyPoints:
-            if self.board.is_legal(point, currentPlayer):
-                legalMoves.append(format_point(point_to_coord(point, self.board.size)))
-
-        legalMoves.sort(key=lambda x: x[0])
+        legalPoints = self.board.legal_moves(currentPlayer)
+        legalMoves = [format_point(self.board.point_to_coord(point))
+                      for point in sort_points(legalPoints, self.board.size)]
         self.respond(' '.join(legalMoves))
         return
 
@@ -377,19 +336,20 @@ class GtpConnection:
                 self.respond('illegal move: "{} {}" wrong colour'.format(board_color, board_move))
                 return
             
-            coords = self.__wrongCoordErr(args)
-            if coords == True:
+            try:
+                row, col = move_to_coord(board_move, self.board.size)
+                # pass is not a legal move in this game
+                if row == PASS:
+                    raise ValueError("pass")
+            except ValueError:
                 self.respond('illegal move: "{} {}" wrong coordinate'.format(args[0],args[1]))
-                return 
-            else:
-                move = coord_to_point(coords[0], coords[1], self.board.size)
-            
-            if self.__occupiedErr(move):
+                return
+
+            move = coord_to_point(row, col, self.board.size)
+            if self.board.board[move] != EMPTY:
                 self.respond('illegal move: "{} {}" occupied'.format(args[0],args[1]))
-                return 
+                return
 
-            coord = move_to_coord(args[1], self.board.size)
-            move = coord_to_point(coord[0], coord[1], self.board.size)
             if not self.board.play_move(move, color):
                 self.respond("Illegal Move: {}".format(board_move))
                 return
@@ -403,53 +363,27 @@ class GtpConnection:
             self.respond("Error: {}".format(str(e)))
 
     def capture_stones(self, point, color):
-        captured_stones = []
+        board = self.board.board
         opponent_color = opponent(color)
-
-        # directions = self.board._neighbors(point) + self.board._diag_neighbors(point)
-        directions = [
-            1, -1,  # Right, Left
-            self.board.NS, -self.board.NS,  # Down, Up
-            self.board.NS + 1, -self.board.NS + 1, self.board.NS - 1, -self.board.NS - 1  # Diagonals
-        ]
-
-        for direction in directions:
+        captured_stones = []
+        # neighbor1 must hold a stone, so neighbor2 and the point behind it
+        # are at most on the BORDER padding and always inside the array
+        for direction in self.board._dirs:
             neighbor1 = point + direction
             neighbor2 = neighbor1 + direction
-            if (
-                self._is_on_board(neighbor1) and  # check if valid point
-                self._is_on_board(neighbor2) and
-                self.board.get_color(neighbor1) == opponent_color and  # the two opponent stones are the same color
-                self.board.get_color(neighbor2) == opponent_color
-            ):
-                # Check if placing a stone of 'color' on either side captures the opponent stones
-                end1 = neighbor1 - direction
-                end2 = neighbor2 + direction
-
-                if (
-                    self._is_on_board(end1) and
-                    self._is_on_board(end2) and
-                    (self.board.get_color(end1) == color or self._is_on_board(end1) == BORDER) and
-                    (self.board.get_color(end2) == color or self._is_on_board(end2) == BORDER)
-                ):
-                    move_coord1 = point_to_coord(neighbor1, self.board.size)
-                    move_coord2 = point_to_coord(neighbor2, self.board.size)
-                    captured_stones.append(format_point(move_coord1))
-                    captured_stones.append(format_point(move_coord2))
-                    self.board.board[neighbor1] = EMPTY
-                    self.board.board[neighbor2] = EMPTY
+            if board[neighbor1] == opponent_color and board[neighbor2] == opponent_color \
+                    and board[neighbor2 + direction] == color:
+                captured_stones.append(neighbor1)
+                captured_stones.append(neighbor2)
+        if not captured_stones:
+            return
+        self.board.remove_stones(captured_stones)
 
         if color == BLACK:
             self.black_score += len(captured_stones)
         elif color == WHITE:
             self.white_score += len(captured_stones)
 
-        #print(captured_stones)
-
-    def _is_on_board(self, point):
-        """ Check if the point is on the game board """
-        return 0 <= point < self.board.maxpoint
-
     def genmove_cmd(self, args: List[str]) -> None:
         """ 
         Modify this function for Assignment 1.
@@ -467,28 +401,23 @@ class GtpConnection:
         elif opponent_color == 1 and self.black_score >= 10:
             self.respond("resign")
             return
-        elif opponent_color == 1 and self.board.result() == "black":
+        result = self.board.result()
+        if opponent_color == 1 and result == "black":
             self.respond("resign")
             return
-        elif opponent_color == 2 and self.board.result() == "white":
+        elif opponent_color == 2 and result == "white":
             self.respond("resign")
             return
         
-        emptyPoints = self.board.get_empty_points()
-        if len(emptyPoints) == 0:
+        legalMoves = self.board.legal_moves(color)
+        if len(legalMoves) == 0:
             self.respond("pass")
             return
-        legalMoves = []
-        for point in emptyPoints:
-            if self.board.is_legal(point, color):
-                legalMoves.append(point)
-        if len(legalMoves) > 0: 
-            move = choice(legalMoves)
-            move_coord = point_to_coord(move, self.board.size)
-            self.board.play_move(move, color)
-            self.respond(format_point(move_coord))
-            self.capture_stones(move, color)
-            return
+        move = choice(legalMoves)
+        move_coord = self.board.point_to_coord(move)
+        self.board.play_move(move, color)
+        self.respond(format_point(move_coord))
+        self.capture_stones(move, color)
 
     def gogui_rules_captured_count_cmd(self, args: List[str]) -> None:
         """ 
@@ -516,19 +445,33 @@ def point_to_coord(point: GO_POINT, boardsize: int) -> Tuple[int, int]:
         return divmod(point, NS)
 
 
+def sort_points(points: List[GO_POINT], boardsize: int) -> np.ndarray:
+    """
+    Sort points in GTP order, by column and then by row.
+    Sorts on the integer points, so that e.g. A2 comes before A10.
+    """
+    points = np.asarray(points, dtype=GO_POINT)
+    NS = boardsize + 1
+    return points[np.lexsort((points, points % NS))]
+
+
+"""
+Column letters used in GTP coordinates. There is no 'I' column.
+"""
+assert MAXSIZE <= 25
+COLUMN_LETTERS = "ABCDEFGHJKLMNOPQRSTUVWXYZ"
+
 def format_point(move: Tuple[int, int]) -> str:
     """
     Return move coordinates as a string such as 'A1', or 'PASS'.
     """
-    assert MAXSIZE <= 25
-    column_letters = "ABCDEFGHJKLMNOPQRSTUVWXYZ"
     if move[0] == PASS:
         return "PASS"
     row, col = move
-    if not 0 <= row < MAXSIZE or not 0 <= col < MAXSIZE:
-        print('line 480')
-        raise ValueError
-    return column_letters[col - 1] + str(row)
+    if __debug__:
+        if not 0 <= row < MAXSIZE or not 0 <= col < MAXSIZE:
+            raise ValueError
+    return COLUMN_LETTERS[col - 1] + str(row)
 
 
 def move_to_coord(point_str: str, board_size: int) -> Tuple[int, int]:
@@ -16,6 +16,7 @@ from typing import List, Tuple
 
 from board_base import (
     board_array_size,
+    point_to_rc_table,
     coord_to_point,
     is_black_white,
     is_black_white_empty,
@@ -30,8 +31,12 @@ from board_base import (
     PASS,
     GO_COLOR,
     GO_POINT,
+    BOARD_DTYPE,
 )
 
+# window for counting stones in 5 consecutive points of a line
+FIVE_WINDOW = np.ones(5, dtype=np.int8)
+
 
 """
 The GoBoard class implements a board and basic functions to play
@@ -66,6 +71,7 @@ class GoBoard(object):
     
     def calculate_rows_cols_diags(self) -> None:
         if self.size < 5:
+            self.lines = np.zeros(0, dtype=GO_POINT)
             return
         # precalculate all rows, cols, and diags for 5-in-a-row detection
         self.rows = []
@@ -123,6 +129,13 @@ class GoBoard(object):
         assert len(self.rows) == self.size
         assert len(self.cols) == self.size
         assert len(self.diags) == (2 * (self.size - 5) + 1) * 2
+        # all lines joined into one index array for detect_five_in_a_row,
+        # separated by point 0 (always BORDER) so no window spans two lines
+        lines = []
+        for line in self.rows + self.cols + self.diags:
+            lines.extend(line)
+            lines.append(0)
+        self.lines = np.array(lines, dtype=GO_POINT)
 
     def reset(self, size: int) -> None:
         """
@@ -131,13 +144,19 @@ class GoBoard(object):
         self.size: int = size
         self.NS: int = size + 1
         self.WE: int = 1
+        NS = self.NS
+        # the 8 capture directions, built once per board size
+        self._dirs: Tuple[int, ...] = (1, -1, NS, -NS, NS + 1, -(NS + 1), NS - 1, -(NS - 1))
+        self._point_to_rc: Tuple[Tuple[int, int], ...] = point_to_rc_table(size)
         self.ko_recapture: GO_POINT = NO_POINT
         self.last_move: GO_POINT = NO_POINT
         self.last2_move: GO_POINT = NO_POINT
         self.current_player: GO_COLOR = BLACK
         self.maxpoint: int = board_array_size(size)
-        self.board: np.ndarray[GO_POINT] = np.full(self.maxpoint, BORDER, dtype=GO_POINT)
+        self.board: np.ndarray[GO_COLOR] = np.full(self.maxpoint, BORDER, dtype=BOARD_DTYPE)
         self._initialize_empty_points(self.board)
+        self._vacant: set = set(self.get_empty_points().tolist())
+        self._legal_cache: dict = {}
         self.calculate_rows_cols_diags()
         self.black_captures = 0
         self.white_captures = 0
@@ -154,12 +173,22 @@ class GoBoard(object):
         b.current_player = self.current_player
         assert b.maxpoint == self.maxpoint
         b.board = np.copy(self.board)
+        b._vacant = set(self._vacant)
         b.black_captures = self.black_captures
         b.white_captures = self.white_captures
         b.last_capture = self.last_capture
         b.capture = self.capture
         return b
 
+    def point_to_coord(self, point: GO_POINT) -> Tuple[int, int]:
+        """
+        Transform point to (row, col) with a table lookup instead of divmod.
+        Special case: PASS is transformed to (PASS,PASS)
+        """
+        if point == PASS:
+            return (PASS, PASS)
+        return self._point_to_rc[point]
+
     def get_color(self, point: GO_POINT) -> GO_COLOR:
         return self.board[point]
 
@@ -189,15 +218,24 @@ class GoBoard(object):
 
     def is_legal(self, point: GO_POINT, color: GO_COLOR) -> bool:
         """
-        Check whether it is legal for color to play on point
-        This method tries to play the move on a temporary copy of the board.
-        This prevents the board from being modified by the move
+        Check whether it is legal for color to play on point.
+        In Ninuki every empty point is legal, so this only checks
+        that point is empty.
         """
         if point == PASS:
             return True
-        board_copy: GoBoard = self.copy()
-        can_play_move = board_copy.play_move(point, color)
-        return can_play_move
+        return self.board[point] == EMPTY
+
+    def legal_moves(self, color: GO_COLOR) -> List[GO_POINT]:
+        """
+        Sorted list of the legal moves of color, not including PASS.
+        Cached until the board changes; do not modify the returned list.
+        """
+        moves = self._legal_cache.get(color)
+        if moves is None:
+            moves = sorted(self._vacant)
+            self._legal_cache[color] = moves
+        return moves
 
     def end_of_game(self) -> bool:
         if self.get_empty_points().size == 0 or self.detect_five_in_a_row() != EMPTY or self.black_captures >= 10 or self.white_captures >= 10:
@@ -319,17 +357,20 @@ class GoBoard(object):
         if self.board[point] != EMPTY:
             return False
         self.board[point] = color
+        self._vacant.discard(point)
+        self._legal_cache.clear()
         self.current_player = opponent(color)
         self.last2_move = self.last_move
         self.last_move = point
         self.last_capture = EMPTY
         self.capture = ()
         O = opponent(color)
-        offsets = [1, -1, self.NS, -self.NS, self.NS+1, -(self.NS+1), self.NS-1, -self.NS+1]
-        for offset in offsets:
+        for offset in self._dirs:
             if self.board[point+offset] == O and self.board[point+(offset*2)] == O and self.board[point+(offset*3)] == color:
                 self.board[point+offset] = EMPTY
                 self.board[point+(offset*2)] = EMPTY
+                self._vacant.add(point+offset)
+                self._vacant.add(point+(offset*2))
                 if color == BLACK:
                     self.black_captures += 2
                 else:
@@ -341,8 +382,7 @@ class GoBoard(object):
     def check_capture(self, point: GO_POINT, color: GO_COLOR) -> int:
         cap = 0
         O = opponent(color)
-        offsets = [1, -1, self.NS, -self.NS, self.NS+1, -(self.NS+1), self.NS-1, -self.NS+1]
-        for offset in offsets:
+        for offset in self._dirs:
             if self.board[point+offset] == O and self.board[point+(offset*2)] == O and self.board[point+(offset*3)] == color:
                 cap += 1
         return cap
@@ -376,9 +416,13 @@ class GoBoard(object):
 
     def undo(self ,point):
         self.board[point] = EMPTY
+        self._vacant.add(point)
+        self._legal_cache.clear()
         if self.last_capture != EMPTY:
             self.board[self.capture[0]] = self.last_capture
             self.board[self.capture[1]] = self.last_capture
+            self._vacant.discard(self.capture[0])
+            self._vacant.discard(self.capture[1])
             if self.last_capture == WHITE:
                 self.black_captures -= 2
             else:
@@ -482,19 +526,16 @@ class GoBoard(object):
         """
         Returns BLACK or WHITE if any five in a row is detected for the color
         EMPTY otherwise.
-        """
-        for r in self.rows:
-            result = self.has_five_in_list(r)
-            if result != EMPTY:
-                return result
-        for c in self.cols:
-            result = self.has_five_in_list(c)
-            if result != EMPTY:
-                return result
-        for d in self.diags:
-            result = self.has_five_in_list(d)
-            if result != EMPTY:
-                return result
+        Counts stones of each color in every window of 5 points
+        along all lines at once.
+        """
+        if self.lines.size < 5:
+            return EMPTY
+        stones = self.board[self.lines]
+        for color in (BLACK, WHITE):
+            counts = np.convolve(stones == color, FIVE_WINDOW, 'valid')
+            if (counts == 5).any():
+                return color
         return EMPTY
 
     def has_five_in_list(self, list) -> GO_COLOR:
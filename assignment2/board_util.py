@@ -23,14 +23,7 @@ class GoBoardUtil(object):
         color:
             the color to generate the move for.
         """
-        moves: np.ndarray[GO_POINT] = board.get_empty_points()
-        # TODO use generator instead.
-        legal_moves: List[GO_POINT] = []
-        # TODO use generator instead.
-        for move in moves:
-            if board.is_legal(move, color):
-                legal_moves.append(move)
-        return legal_moves
+        return list(board.legal_moves(color))
 
     @staticmethod
     def generate_random_move(board: GoBoard, color: GO_COLOR, 
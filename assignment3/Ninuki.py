@@ -12,7 +12,7 @@ from board import GoBoard
 from board_util import GoBoardUtil
 from engine import GoEngine
 import random
-import copy
+import numpy as np
 
 
 class Go0(GoEngine):
@@ -45,46 +45,31 @@ class SimulationPlayer(object):
     
     def genmove(self, state: GoBoard):
         assert not state.end_of_game()
-        moves = state.get_empty_points()
+        moves = state.legal_moves(state.current_player)
         numMoves = len(moves)
-
-        #stuff = []
-
-
-        best_move = None
-        best_score = float('-inf') 
-
-        score = [0] * numMoves
-        for i in range(numMoves):
-            move = moves[i]
-            for _ in range(10):
-                score = self.simulate(state, move)
-                if score > best_score:
-                    best_score = score
-                    best_move = move
-
-            #stuff.append(best_move)
-        # ignore bestIndex and best
-        #bestIndex = score.index(max(score[i]))
-        #best = moves[bestIndex]
-
-        #print(stuff)
-        #print("Best move:", best_move, "score", best_score)
-        assert best_move in state.get_empty_points()
+        # simulate already averages self.numSimulations playouts per move
+        scores = np.zeros(numMoves, dtype=np.float64)
+        for i, move in enumerate(moves):
+            scores[i] = self.simulate(state, move)
+        best_move = moves[int(scores.argmax())]
+        assert state.is_legal(best_move, state.current_player)
         return best_move
 
     def simulate(self, state: GoBoard, move):
         stats = [0] * 3
-        c_state = copy.deepcopy(state)
-        c_state.play_move(move, state.current_player)
+        color = state.current_player
+        before_move = state.snapshot()
+        state.play_move(move, color)
+        after_move = state.snapshot()
         
         for _ in range(self.numSimulations):
-            winner = c_state.simulation()
+            winner = state.simulation()
             stats[winner] += 1
-            c_state = copy.deepcopy(c_state)         
+            state.restore(after_move)
+        state.restore(before_move)
         assert sum(stats) == self.numSimulations
         eval = (stats[BLACK] + 0.5 * stats[EMPTY]) / self.numSimulations
-        if state.current_player == WHITE:
+        if color == WHITE:
             eval = 1 - eval
         return eval
 
@@ -13,10 +13,11 @@ The board uses a 1-dimensional representation with padding
 
 import numpy as np
 import random
-from typing import List
+from typing import List, Tuple
 
 from board_base import (
     board_array_size,
+    point_to_rc_table,
     coord_to_point,
     is_black_white,
     is_black_white_empty,
@@ -31,8 +32,12 @@ from board_base import (
     PASS,
     GO_COLOR,
     GO_POINT,
+    BOARD_DTYPE,
 )
 
+# window for counting stones in 5 consecutive points of a line
+FIVE_WINDOW = np.ones(5, dtype=np.int8)
+
 
 """
 The GoBoard class implements a board and basic functions to play
@@ -67,6 +72,7 @@ class GoBoard(object):
     
     def calculate_rows_cols_diags(self) -> None:
         if self.size < 5:
+            self.lines = np.zeros(0, dtype=GO_POINT)
             return
         # precalculate all rows, cols, and diags for 5-in-a-row detection
         self.rows = []
@@ -124,6 +130,13 @@ class GoBoard(object):
         assert len(self.rows) == self.size
         assert len(self.cols) == self.size
         assert len(self.diags) == (2 * (self.size - 5) + 1) * 2
+        # all lines joined into one index array for detect_five_in_a_row,
+        # separated by point 0 (always BORDER) so no window spans two lines
+        lines = []
+        for line in self.rows + self.cols + self.diags:
+            lines.extend(line)
+            lines.append(0)
+        self.lines = np.array(lines, dtype=GO_POINT)
 
     def reset(self, size: int) -> None:
         """
@@ -132,13 +145,19 @@ class GoBoard(object):
         self.size: int = size
         self.NS: int = size + 1
         self.WE: int = 1
+        NS = self.NS
+        # the 8 capture directions, built once per board size
+        self._dirs: Tuple[int, ...] = (1, -1, NS, -NS, NS + 1, -(NS + 1), NS - 1, -(NS - 1))
+        self._point_to_rc: Tuple[Tuple[int, int], ...] = point_to_rc_table(size)
         self.ko_recapture: GO_POINT = NO_POINT
         self.last_move: GO_POINT = NO_POINT
         self.last2_move: GO_POINT = NO_POINT
         self.current_player: GO_COLOR = BLACK
         self.maxpoint: int = board_array_size(size)
-        self.board: np.ndarray[GO_POINT] = np.full(self.maxpoint, BORDER, dtype=GO_POINT)
+        self.board: np.ndarray[GO_COLOR] = np.full(self.maxpoint, BORDER, dtype=BOARD_DTYPE)
         self._initialize_empty_points(self.board)
+        self._vacant: set = set(self.get_empty_points().tolist())
+        self._legal_cache: dict = {}
         self.calculate_rows_cols_diags()
         self.black_captures = 0
         self.white_captures = 0
@@ -153,8 +172,37 @@ class GoBoard(object):
         b.current_player = self.current_player
         assert b.maxpoint == self.maxpoint
         b.board = np.copy(self.board)
+        b._vacant = set(self._vacant)
         return b
 
+    def snapshot(self) -> tuple:
+        """
+        Save the state needed to undo any number of moves with restore()
+        """
+        return (np.copy(self.board), set(self._vacant), self.current_player,
+                self.last_move, self.last2_move, self.ko_recapture,
+                self.black_captures, self.white_captures)
+
+    def restore(self, snapshot: tuple) -> None:
+        """
+        Restore a state saved by snapshot(). The board array is
+        copied in place, so no new array is allocated.
+        """
+        board, vacant, self.current_player, self.last_move, self.last2_move, \
+            self.ko_recapture, self.black_captures, self.white_captures = snapshot
+        np.copyto(self.board, board)
+        self._vacant = set(vacant)
+        self._legal_cache.clear()
+
+    def point_to_coord(self, point: GO_POINT) -> Tuple[int, int]:
+        """
+        Transform point to (row, col) with a table lookup instead of divmod.
+        Special case: PASS is transformed to (PASS,PASS)
+        """
+        if point == PASS:
+            return (PASS, PASS)
+        return self._point_to_rc[point]
+
     def get_color(self, point: GO_POINT) -> GO_COLOR:
         return self.board[point]
 
@@ -184,15 +232,24 @@ class GoBoard(object):
 
     def is_legal(self, point: GO_POINT, color: GO_COLOR) -> bool:
         """
-        Check whether it is legal for color to play on point
-        This method tries to play the move on a temporary copy of the board.
-        This prevents the board from being modified by the move
+        Check whether it is legal for color to play on point.
+        In Ninuki every empty point is legal, so this only checks
+        that point is empty.
         """
         if point == PASS:
             return True
-        board_copy: GoBoard = self.copy()
-        can_play_move = board_copy.play_move(point, color)
-        return can_play_move
+        return self.board[point] == EMPTY
+
+    def legal_moves(self, color: GO_COLOR) -> List[GO_POINT]:
+        """
+        Sorted list of the legal moves of color, not including PASS.
+        Cached until the board changes; do not modify the returned list.
+        """
+        moves = self._legal_cache.get(color)
+        if moves is None:
+            moves = sorted(self._vacant)
+            self._legal_cache[color] = moves
+        return moves
 
     def end_of_game(self) -> bool:
         return self.last_move == PASS \
@@ -313,15 +370,18 @@ class GoBoard(object):
         if self.board[point] != EMPTY:
             return False
         self.board[point] = color
+        self._vacant.discard(point)
+        self._legal_cache.clear()
         self.current_player = opponent(color)
         self.last2_move = self.last_move
         self.last_move = point
         O = opponent(color)
-        offsets = [1, -1, self.NS, -self.NS, self.NS+1, -(self.NS+1), self.NS-1, -self.NS+1]
-        for offset in offsets:
+        for offset in self._dirs:
             if self.board[point+offset] == O and self.board[point+(offset*2)] == O and self.board[point+(offset*3)] == color:
                 self.board[point+offset] = EMPTY
                 self.board[point+(offset*2)] = EMPTY
+                self._vacant.add(point+offset)
+                self._vacant.add(point+(offset*2))
                 if color == BLACK:
                     self.black_captures += 2
                 else:
@@ -374,19 +434,16 @@ class GoBoard(object):
         """
         Returns BLACK or WHITE if any five in a row is detected for the color
         EMPTY otherwise.
-        """
-        for r in self.rows:
-            result = self.has_five_in_list(r)
-            if result != EMPTY:
-                return result
-        for c in self.cols:
-            result = self.has_five_in_list(c)
-            if result != EMPTY:
-                return result
-        for d in self.diags:
-            result = self.has_five_in_list(d)
-            if result != EMPTY:
-                return result
+        Counts stones of each color in every window of 5 points
+        along all lines at once.
+        """
+        if self.lines.size < 5:
+            return EMPTY
+        stones = self.board[self.lines]
+        for color in (BLACK, WHITE):
+            counts = np.convolve(stones == color, FIVE_WINDOW, 'valid')
+            if (counts == 5).any():
+                return color
         return EMPTY
 
     def has_five_in_list(self, list) -> GO_COLOR:
@@ -411,7 +468,7 @@ class GoBoard(object):
     """
     def simulation(self): 
         if not self.end_of_game():
-            allMoves = self.get_empty_points()
+            allMoves = list(self.legal_moves(self.current_player))
             if len(allMoves) == 0:
                 return EMPTY
             random.shuffle(allMoves)
@@ -6,6 +6,8 @@ This file is imported by board.py.
 
 import numpy as np
 import random
+from functools import lru_cache
+from typing import Tuple
 
 """
 Encoding of colors on and off a Go board.
@@ -17,6 +19,12 @@ BLACK = GO_COLOR(1)
 WHITE = GO_COLOR(2)
 BORDER = GO_COLOR(3)
 
+"""
+dtype of the board array. All color values fit in a signed byte,
+so the board is stored as one contiguous np.int8 per point.
+"""
+BOARD_DTYPE = np.int8
+
 
 def is_black_white(color: GO_COLOR) -> bool:
     return color == BLACK or color == WHITE
@@ -60,14 +68,23 @@ def board_array_size(size: int) -> int:
     return size * size + 3 * (size + 1)
 
 """
-where1d: Helper function for using np.where with 1-d arrays.
-The result of np.where is a tuple which contains the indices 
-of elements that fulfill the condition.
-For 1-d arrays, this is of type Tuple[ndarray].
-The [0] indexing is needed to extract the ndarray result from the singleton tuple.
+point_to_rc_table: (row, col) = divmod(point, size + 1) for every
+array index of a size x size board. Computed once per size and
+shared by all boards of that size.
+"""
+@lru_cache(maxsize=None)
+def point_to_rc_table(size: int) -> Tuple[Tuple[int, int], ...]:
+    NS = size + 1
+    return tuple(divmod(p, NS) for p in range(board_array_size(size)))
+
+"""
+where1d: Helper function returning the indices of the elements
+of a 1-d array that fulfill the condition.
+np.flatnonzero returns the index array directly, without
+building the singleton tuple that np.where returns.
 """
 def where1d(condition: np.ndarray) -> np.ndarray:
-    return np.where(condition)[0]
+    return np.flatnonzero(condition)
 
 def coord_to_point(row: int, col: int, board_size: int) -> GO_POINT:
     """
@@ -10,7 +10,6 @@ at the University of Edinburgh.
 """
 import traceback
 import numpy as np
-import re
 import random
 from sys import stdin, stdout, stderr
 from typing import Any, Callable, Dict, List, Tuple
@@ -30,6 +29,11 @@ from board import GoBoard
 from board_util import GoBoardUtil
 from engine import GoEngine
 
+"""
+Translation table from board colors to the characters of gogui-rules_board
+"""
+BOARD_CHARS = bytes.maketrans(bytes([BLACK, WHITE, EMPTY, BORDER]), b"XO.\n")
+
 class GtpConnection:
     def __init__(self, go_engine: GoEngine, board: GoBoard, debug_mode: bool = False) -> None:
         """
@@ -100,6 +104,9 @@ class GtpConnection:
         Start a GTP connection. 
         This function continuously monitors standard input for commands.
         """
+        # with line buffering every complete response line is flushed
+        # by the stream itself, so respond and error need no flush
+        stdout.reconfigure(line_buffering=True, write_through=True)
         line = stdin.readline()
         while line:
             self.get_cmd(line)
@@ -115,7 +122,11 @@ class GtpConnection:
             return
         # Strip leading numbers from regression tests
         if command[0].isdigit():
-            command = re.sub("^\d+", "", command).lstrip()
+            i = 1
+            n = len(command)
+            while i < n and command[i].isdigit():
+                i += 1
+            command = command[i:].lstrip()
 
         elements: List[str] = command.split()
         if not elements:
@@ -134,7 +145,6 @@ class GtpConnection:
         else:
             self.debug_msg("Unknown command: {}\n".format(command_name))
             self.error("Unknown command")
-            stdout.flush()
 
     def has_arg_error(self, cmd: str, argnum: int) -> bool:
         """
@@ -155,12 +165,10 @@ class GtpConnection:
     def error(self, error_msg: str) -> None:
         """ Send error msg to stdout """
         stdout.write("? {}\n\n".format(error_msg))
-        stdout.flush()
 
     def respond(self, response: str = "") -> None:
         """ Send response to stdout """
         stdout.write("= {}\n\n".format(response))
-        stdout.flush()
 
     def reset(self, size: int) -> None:
         """
@@ -178,6 +186,7 @@ class GtpConnection:
     def quit_cmd(self, args: List[str]) -> None:
         """ Quit game and exit the GTP interface """
         self.respond()
+        stdout.flush()
         exit()
 
     def name_cmd(self, args: List[str]) -> None:
@@ -229,13 +238,10 @@ class GtpConnection:
         """
         board_color: str = args[0].lower()
         color: GO_COLOR = color_to_int(board_color)
-        moves: List[GO_POINT] = GoBoardUtil.generate_legal_moves(self.board, color)
-        gtp_moves: List[str] = []
-        for move in moves:
-            coords: Tuple[int, int] = point_to_coord(move, self.board.size)
-            gtp_moves.append(format_point(coords))
-        sorted_moves = " ".join(sorted(gtp_moves))
-        self.respond(sorted_moves)
+        moves: List[GO_POINT] = self.board.legal_moves(color)
+        gtp_moves: List[str] = [format_point(self.board.point_to_coord(move))
+                                for move in sort_points(moves, self.board.size)]
+        self.respond(" ".join(gtp_moves))
 
     """
     ==========================================================================
@@ -273,22 +279,12 @@ class GtpConnection:
     def gogui_rules_board_cmd(self, args: List[str]) -> None:
         """ We already implemented this function for Assignment 2 """
         size = self.board.size
-        str = ''
-        for row in range(size-1, -1, -1):
-            start = self.board.row_start(row + 1)
-            for i in range(size):
-                #str += '.'
-                point = self.board.board[start + i]
-                if point == BLACK:
-                    str += 'X'
-                elif point == WHITE:
-                    str += 'O'
-                elif point == EMPTY:
-                    str += '.'
-                else:
-                    assert False
-            str += '\n'
-        self.respond(str)
+        NS = self.board.NS
+        # each row of size points is followed by the BORDER point
+        # that pads the next row, which is translated to the newline
+        rows = self.board.board[NS + 1 : (size + 1) * NS + 1].reshape(size, NS)
+        text = rows[::-1].tobytes().translate(BOARD_CHARS)
+        self.respond(text.decode("ascii"))
 
 
     def gogui_rules_final_result_cmd(self, args: List[str]) -> None:
@@ -317,13 +313,10 @@ class GtpConnection:
             (self.board.get_captures(WHITE) >= 10):
             self.respond("")
             return
-        legal_moves = self.board.get_empty_points()
-        gtp_moves: List[str] = []
-        for move in legal_moves:
-            coords: Tuple[int, int] = point_to_coord(move, self.board.size)
-            gtp_moves.append(format_point(coords))
-        sorted_moves = " ".join(sorted(gtp_moves))
-        self.respond(sorted_moves)
+        legal_moves = self.board.legal_moves(self.board.current_player)
+        gtp_moves: List[str] = [format_point(self.board.point_to_coord(move))
+                                for move in sort_points(legal_moves, self.board.size)]
+        self.respond(" ".join(gtp_moves))
 
     def play_cmd(self, args: List[str]) -> None:
         """ We already implemented this function for Assignment 2 """
@@ -379,11 +372,12 @@ class GtpConnection:
             self.respond("policy: random or rule_based")
     
     def sort_move(self, moves):
-        gtp_moves = [format_point(point_to_coord(move, self.board.size)).lower() for move in moves]
-        return " ".join(sorted(gtp_moves))
+        gtp_moves = [format_point(self.board.point_to_coord(move)).lower()
+                     for move in sort_points(moves, self.board.size)]
+        return " ".join(gtp_moves)
 
     def policy_moves_cmd(self, args: List[str]):
-        legal_moves = self.board.get_empty_points()
+        legal_moves = self.board.legal_moves(self.board.current_player)
         sorted_moves = self.sort_move(legal_moves)
         
         if self.policytype == "random":
@@ -432,8 +426,8 @@ class GtpConnection:
         if result1 == opponent(color) or result2 == opponent(color):
             self.respond("resign")
             return
-        legal_moves = self.board.get_empty_points()
-        if legal_moves.size == 0:
+        legal_moves = self.board.legal_moves(color)
+        if len(legal_moves) == 0:
             self.respond("pass")
             return
         rng = np.random.default_rng()
@@ -445,7 +439,7 @@ class GtpConnection:
             player = SimulationPlayer(10)
             move = player.genmove(self.board)
 
-            x = format_point(point_to_coord(move, self.board.size))
+            x = format_point(self.board.point_to_coord(move))
             self.play_cmd([board_color, x, 'print_move'])
             return
 
@@ -461,7 +455,7 @@ class GtpConnection:
             if len(moveset) > 0:
                 move = moveset[0]
         
-        move_coord = point_to_coord(move, self.board.size)
+        move_coord = self.board.point_to_coord(move)
         move_as_string = format_point(move_coord)
         self.play_cmd([board_color, move_as_string, 'print_move'])
     
@@ -492,18 +486,33 @@ def point_to_coord(point: GO_POINT, boardsize: int) -> Tuple[int, int]:
         return divmod(point, NS)
 
 
+def sort_points(points: List[GO_POINT], boardsize: int) -> np.ndarray:
+    """
+    Sort points in GTP order, by column and then by row.
+    Sorts on the integer points, so that e.g. A2 comes before A10.
+    """
+    points = np.asarray(points, dtype=GO_POINT)
+    NS = boardsize + 1
+    return points[np.lexsort((points, points % NS))]
+
+
+"""
+Column letters used in GTP coordinates. There is no 'I' column.
+"""
+assert MAXSIZE <= 25
+COLUMN_LETTERS = "ABCDEFGHJKLMNOPQRSTUVWXYZ"
+
 def format_point(move: Tuple[int, int]) -> str:
     """
     Return move coordinates as a string such as 'A1', or 'PASS'.
     """
-    assert MAXSIZE <= 25
-    column_letters = "ABCDEFGHJKLMNOPQRSTUVWXYZ"
     if move[0] == PASS:
         return "PASS"
     row, col = move
-    if not 0 <= row < MAXSIZE or not 0 <= col < MAXSIZE:
-        raise ValueError
-    return column_letters[col - 1] + str(row)
+    if __debug__:
+        if not 0 <= row < MAXSIZE or not 0 <= col < MAXSIZE:
+            raise ValueError
+    return COLUMN_LETTERS[col - 1] + str(row)
 
 
 def move_to_coord(point_str: str, board_size: int) -> Tuple[int, int]:
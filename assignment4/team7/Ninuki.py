@@ -5,13 +5,18 @@
 Cmput 455 sample code
 Written by Cmput 455 TA and Martin Mueller
 """
-from gtp_connection import GtpConnection, format_point, point_to_coord
+from gtp_connection import GtpConnection, format_point
 from board_base import DEFAULT_SIZE, GO_POINT, GO_COLOR
 from board import GoBoard
 from board_util import GoBoardUtil
 from engine import GoEngine
+from search_jit import NUMBA_AVAILABLE, TIME_CHECK_MASK, COMPILE_TIME, JitSearch, is_compiled
+try:
+    # optional Cython search for 7x7, see _ninuki7.pyx
+    from _ninuki7 import BOARD_SIZE as SEARCH7_SIZE, Search7
+except ImportError:
+    Search7 = None
 import time
-import random
 from board_base import (
     BLACK,
     WHITE,
@@ -19,11 +24,20 @@ from board_base import (
     BORDER,
     GO_COLOR, GO_POINT,
     PASS,
+    NO_POINT,
     MAXSIZE,
     coord_to_point,
     opponent
 )
 
+"""
+Transposition table entry flags: the stored value is exact,
+a lower bound (beta cutoff) or an upper bound (no move raised alpha).
+"""
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
 
 class A4SubmissionPlayer(GoEngine):
     def __init__(self) -> None:
@@ -40,12 +54,18 @@ class A4SubmissionPlayer(GoEngine):
             board.current_player = WHITE
         else:
             board.current_player = BLACK
-        winner, move = self.solve_board(board)
-        board.last_move = move
-        return format_point(point_to_coord(self.best_move, self.board.size)).lower()
+        # solve_board checks rule() first and plays a tactical move
+        # without searching, so rule() runs only once per move
+        self.solve_board(board)
+        return format_point(board.point_to_coord(self.best_move)).lower()
 
     def alpha_beta(self, alpha, beta, depth):
-        if time.time() - self.solve_start_time > (self.time_limit - 0.01):
+        # reading the clock is expensive, so check it only every
+        # TIME_CHECK_MASK + 1 nodes; once out of time, stay out of time
+        self.node_count += 1
+        if self.node_count & TIME_CHECK_MASK == 0 and time.time() > self.deadline:
+            self.timed_out = True
+        if self.timed_out:
             return 0, False, True
 
         is_terminal, winner = self.board.is_terminal()
@@ -60,10 +80,49 @@ class A4SubmissionPlayer(GoEngine):
         if depth >= self.max_depth:
             return 0, False, False
 
+        # Probe the transposition table. At the root best_move must
+        # still be set, so the entry is only used for move ordering there.
+        # Solved entries hold game-theoretic values or bounds, valid at any
+        # depth; the others only if searched at least as deep as needed here.
+        # A depth-limited bound that narrows the window leaves the result
+        # depth-limited too.
+        key = self.board.zhash
+        remaining = self.max_depth - depth
+        tt_move = None
         any_unsolved = False
+        entry = self.tt.get(key)
+        if entry is not None:
+            tt_value, tt_depth, tt_flag, tt_move, tt_solved = entry
+            if depth > 0 and (tt_solved or tt_depth >= remaining):
+                if tt_flag == EXACT:
+                    return tt_value, tt_solved, False
+                elif tt_flag == LOWER_BOUND and tt_value > alpha:
+                    alpha = tt_value
+                    any_unsolved = not tt_solved
+                elif tt_flag == UPPER_BOUND and tt_value < beta:
+                    beta = tt_value
+                    any_unsolved = not tt_solved
+                if alpha >= beta:
+                    return tt_value, tt_solved, False
+
+        alpha_orig = alpha
+        best_move = None
         moves = GoBoardUtil.generate_legal_moves(self.board, self.board.current_player)
         if depth == 0:
-            random.shuffle(moves)
+            # break ties between root moves by distance to the last move,
+            # so a move played before anything is proven is a nearby one,
+            # not the first empty point. Below the root, board order
+            # proves draws several times faster.
+            moves.sort(key=self.last_move_distance)
+        moves.sort(key=self.threat_order)
+        # try the previous iteration's principal variation move at the root,
+        # and the transposition table move elsewhere, first
+        first_move = tt_move
+        if depth == 0 and self.root_pv:
+            first_move = self.root_pv[0]
+        if first_move is not None and first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
 
         for move in moves:
             self.board.play_move(move, self.board.current_player)
@@ -80,62 +139,130 @@ class A4SubmissionPlayer(GoEngine):
 
             if value > alpha:
                 alpha = value
+                best_move = move
                 if depth == 0:
                     self.best_move = move
 
             if solved and value == 1:
+                self.tt[key] = (1, remaining, EXACT, move, True)
                 return 1, True, False
 
             if value >= beta:
-                return beta, True, False
-        
+                self.tt[key] = (beta, remaining, LOWER_BOUND, move, solved)
+                return beta, solved, False
+
+        flag = UPPER_BOUND if alpha <= alpha_orig else EXACT
+        self.tt[key] = (alpha, remaining, flag, best_move, not any_unsolved)
         return alpha, not any_unsolved, False
 
+    def threat_order(self, move):
+        """
+        Sort key for move ordering, using the threat patterns of analyze:
+        win, block win, open four, then all other moves.
+        """
+        return self.board.analyze(move) or 4
+
+    def last_move_distance(self, move):
+        """
+        Chebyshev distance from move to the last move, or to the center
+        if there is no last move, as in board_base.distance_order
+        """
+        board = self.board
+        row, col = board._point_to_rc[move]
+        if board.last_move >= 0:
+            last_row, last_col = board._point_to_rc[board.last_move]
+        else:
+            last_row = last_col = (board.size + 1) // 2
+        return max(abs(row - last_row), abs(col - last_col))
+
+    def principal_variation(self):
+        """
+        Follow the best moves stored in the transposition table from the root
+        """
+        pv = []
+        entry = self.tt.get(self.board.zhash)
+        while entry is not None and entry[3] is not None and len(pv) < self.max_depth:
+            pv.append(entry[3])
+            self.board.play_move(entry[3], self.board.current_player)
+            entry = self.tt.get(self.board.zhash)
+        for _ in pv:
+            self.board.undo()
+        return pv
+
+    def compiled_search(self):
+        """
+        The fastest compiled search available for self.board: the Cython
+        search specialized for 7x7, then the Numba one.
+        The Numba search is compiled on first use, so it is only used
+        if it is compiled already or the time left covers compiling it.
+        None if no compiled search can be used.
+        """
+        if Search7 is not None and self.board.size == SEARCH7_SIZE:
+            return Search7(self.board)
+        if NUMBA_AVAILABLE and (is_compiled() or self.deadline - time.time() > COMPILE_TIME):
+            return JitSearch(self.board)
+        return None
+
     def solve_board(self, board):
         self.solve_start_time = time.time()
+        self.deadline = self.solve_start_time + self.time_limit - 0.01
+        x = self.rule(board)
+        if x is not None:
+            self.best_move = x
+            if board.current_player == BLACK: 
+                return "b", format_point(board.point_to_coord(self.best_move)).lower()
+            else:
+                return "w", format_point(board.point_to_coord(self.best_move)).lower()
+
+        # only copy the board and build the table when actually searching
         self.board = board.copy()
+        # current_player may have been set directly by get_move
+        self.board.zhash = self.board.compute_zhash()
         self.tt = {}
+        self.root_pv = []
+        self.node_count = 0
+        self.timed_out = False
         if self.board.get_empty_points().size == 0:
             self.best_move = PASS
         else:
             self.best_move = self.board.get_empty_points()[0]
 
-        x = self.rule()
-        if x is not None:
-            self.best_move = x
-            if self.board.current_player == BLACK: 
-                return "b", format_point(point_to_coord(self.best_move, self.board.size)).lower()
-            else:
-                return "w", format_point(point_to_coord(self.best_move, self.board.size)).lower()
-
         solved = False
         timeout = False
         self.max_depth = 1
+        search = self.compiled_search()
         while not solved and not timeout:
-            result, solved, timeout = self.alpha_beta(-1, 1, 0)
+            if search is not None:
+                result, solved, timeout = search.alpha_beta(-1, 1, self.max_depth, self.deadline)
+                if search.best_move != NO_POINT:
+                    self.best_move = search.best_move
+            else:
+                result, solved, timeout = self.alpha_beta(-1, 1, 0)
+                if not timeout:
+                    self.root_pv = self.principal_variation()
             self.max_depth += 1
 
         if timeout:
-            return self.board.check()
-            
+            # self.best_move holds the best move of the deepest search
+            return "unknown", None
         elif result == 1:
             if self.board.current_player == BLACK:
-                return "b", format_point(point_to_coord(self.best_move, self.board.size)).lower()
+                return "b", format_point(self.board.point_to_coord(self.best_move)).lower()
             else:
-                return "w", format_point(point_to_coord(self.best_move, self.board.size)).lower()
+                return "w", format_point(self.board.point_to_coord(self.best_move)).lower()
         elif result == -1:
             if self.board.current_player == BLACK:
                 return "w", None
             else:
                 return "b", None
         else:
-            return "draw", format_point(point_to_coord(self.best_move, self.board.size)).lower()
+            return "draw", format_point(self.board.point_to_coord(self.best_move)).lower()
     
-    def rule(self):
+    def rule(self, board):
         moves = [[] for i in range(4)]
-        moves[0] = self.board.get_potential_moves()
+        moves[0] = board.get_potential_moves()
         for move in moves[0]:
-            result = self.board.analyze(move)
+            result = board.analyze(move)
             if result != 0:
                 moves[result].append(move)
         moveset = moves[1] + moves[2] + moves[3]
@@ -0,0 +1,505 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+_ninuki7.pyx
+Alpha-beta search for Ninuki, specialized for the 7x7 board.
+
+The same search as search_jit._alpha_beta, but the board geometry
+(NS, MAXPOINT and the 8 directions) is made of C compile-time constants,
+so the compiler can unroll the direction loops and fold the offsets.
+The transposition table is an open-addressing C hash table keyed by the
+Zobrist hash. It doubles in size whenever it is half full, up to
+TT_MAX_SIZE slots; after that new positions replace the entry in their
+home slot, unless that entry is solved and the new one is not.
+The old table is freed only after it is copied, so growing to the
+maximum size briefly takes 1.5 times its memory (96 MB).
+
+Building it is optional and needs Cython and a C compiler.
+Build in place, from this directory, with
+    python setup.py build_ext --inplace
+and add CFLAGS="-march=native" to tune it for the local machine.
+Ninuki.py uses Search7 on 7x7 boards when the module is built,
+and JitSearch or its Python alpha_beta otherwise.
+"""
+
+import time
+from board_base import distance_order
+from libc.stdint cimport int8_t, int16_t, int32_t, uint64_t
+from libc.stdlib cimport calloc, free
+
+cdef enum:
+    SIZE = 7
+    NS = 8                  # SIZE + 1
+    MAXPOINT = 73           # SIZE * SIZE + 3 * (SIZE + 1)
+    EMPTY = 0
+    BLACK = 1
+    WHITE = 2
+    NO_POINT = -1
+    EXACT = 0
+    LOWER_BOUND = 1
+    UPPER_BOUND = 2
+    TIME_CHECK_MASK = 1023
+    MAX_PLY = 128           # longer than any 7x7 game
+    MAX_CAPTURED = 16
+    TT_INITIAL_SIZE = 1 << 20
+    TT_MAX_SIZE = 1 << 22     # 64 MB of entries
+
+"""
+Board size this module is compiled for
+"""
+BOARD_SIZE = SIZE
+
+# the 4 orthogonal neighbors, in the order of GoBoard._neighbors
+cdef int NEIGHBOR_DIRS[4]
+NEIGHBOR_DIRS[:] = [-1, 1, -NS, NS]
+
+cdef struct TTEntry:
+    uint64_t key
+    int8_t value
+    int8_t flag
+    int8_t solved
+    int8_t used
+    int16_t depth
+    int16_t move
+
+cdef struct SearchState:
+    int8_t* board
+    const uint64_t* zobrist             # (MAXPOINT, 3)
+    const uint64_t* zobrist_captures    # (3, MAXPOINT + 1)
+    const int32_t* root_order           # (SIZE * SIZE,) board points
+    uint64_t zobrist_side
+    int captures[3]
+    int16_t move_buf[MAX_PLY][MAXPOINT]
+    int16_t cap_stack[MAX_PLY][MAX_CAPTURED]
+    int ncap[MAX_PLY]
+    TTEntry* tt
+    size_t tt_mask
+    size_t tt_count
+    long nodes
+    int best_move
+    bint timeout
+    double deadline
+
+
+cdef inline int _capture(int8_t* board, int point, int d, int color, int opp,
+                         int16_t* cap, int n) noexcept:
+    if board[point + d] == opp and board[point + 2 * d] == opp \
+            and board[point + 3 * d] == color:
+        cap[n] = point + d
+        cap[n + 1] = point + 2 * d
+        return n + 2
+    return n
+
+
+cdef uint64_t _play(SearchState* st, int point, int color, int ply,
+                    uint64_t zhash) noexcept:
+    """
+    Play color on point, remove captured pairs and record them
+    in cap_stack[ply]. Returns the new Zobrist hash.
+    """
+    cdef int8_t* board = st.board
+    cdef int16_t* cap = st.cap_stack[ply]
+    cdef int opp = WHITE + BLACK - color
+    cdef int n = 0, i, old
+    cdef uint64_t h = zhash ^ st.zobrist[point * 3 + color] ^ st.zobrist_side
+    board[point] = color
+    n = _capture(board, point, 1, color, opp, cap, n)
+    n = _capture(board, point, -1, color, opp, cap, n)
+    n = _capture(board, point, NS, color, opp, cap, n)
+    n = _capture(board, point, -NS, color, opp, cap, n)
+    n = _capture(board, point, NS + 1, color, opp, cap, n)
+    n = _capture(board, point, -(NS + 1), color, opp, cap, n)
+    n = _capture(board, point, NS - 1, color, opp, cap, n)
+    n = _capture(board, point, -(NS - 1), color, opp, cap, n)
+    for i in range(n):
+        board[cap[i]] = EMPTY
+        h ^= st.zobrist[cap[i] * 3 + opp]
+    st.ncap[ply] = n
+    if n > 0:
+        old = st.captures[color]
+        st.captures[color] = old + n
+        h ^= st.zobrist_captures[color * (MAXPOINT + 1) + old] \
+            ^ st.zobrist_captures[color * (MAXPOINT + 1) + old + n]
+    return h
+
+
+cdef uint64_t _undo(SearchState* st, int point, int color, int ply,
+                    uint64_t zhash) noexcept:
+    """
+    Take back the move of color on point played by _play at ply.
+    Returns the restored Zobrist hash.
+    """
+    cdef int8_t* board = st.board
+    cdef int opp = WHITE + BLACK - color
+    cdef int n = st.ncap[ply], i, p, old
+    cdef uint64_t h = zhash ^ st.zobrist[point * 3 + color] ^ st.zobrist_side
+    board[point] = EMPTY
+    for i in range(n):
+        p = st.cap_stack[ply][i]
+        board[p] = opp
+        h ^= st.zobrist[p * 3 + opp]
+    if n > 0:
+        old = st.captures[color]
+        st.captures[color] = old - n
+        h ^= st.zobrist_captures[color * (MAXPOINT + 1) + old] \
+            ^ st.zobrist_captures[color * (MAXPOINT + 1) + old - n]
+    return h
+
+
+cdef inline int _line_length(int8_t* board, int point, int d) noexcept:
+    cdef int c = board[point]
+    cdef int num_found = 1
+    cdef int p = point + d
+    while board[p] == c:
+        num_found += 1
+        p += d
+    p = point - d
+    while board[p] == c:
+        num_found += 1
+        p -= d
+    return num_found
+
+
+cdef bint _five_in_a_row(int8_t* board, int point) noexcept:
+    """
+    Whether the stone on point is part of five or more in a row
+    """
+    return _line_length(board, point, 1) >= 5 \
+        or _line_length(board, point, NS) >= 5 \
+        or _line_length(board, point, NS + 1) >= 5 \
+        or _line_length(board, point, NS - 1) >= 5
+
+
+cdef inline int _own_threat(int8_t* board, int move, int v, int color,
+                            int opp, int opp_captures) noexcept:
+    """
+    Threat of move next to its own stone on move + v, as in GoBoard.analyze:
+    1 for five in a row, 2 for blocking a capture that would let the
+    opponent win, 3 for an open four, 0 otherwise.
+    """
+    cdef int point = move + v
+    cdef int connect = 2, slot = 0, i, test
+    cdef int pattern = 0
+    for i in range(1, 4):
+        test = board[point + v * i]
+        if test == color:
+            connect += 1
+        else:
+            if test == EMPTY:
+                slot += 1
+            break
+    for i in range(2, 4):
+        test = board[point - v * i]
+        if test == color:
+            connect += 1
+        else:
+            if test == EMPTY:
+                slot += 1
+            break
+    if connect >= 5:
+        return 1
+    elif connect == 4 and slot == 2:
+        pattern = 3
+    if board[point + v] == color and board[point + 2 * v] == opp \
+            and opp_captures >= 8:
+        pattern = 2
+    return pattern
+
+
+cdef inline int _opp_threat(int8_t* board, int move, int v, int color,
+                            int opp, int own_captures) noexcept:
+    """
+    Threat of move next to an opponent stone on move + v, as in
+    GoBoard.analyze: 1 for a winning capture, 2 for blocking five, 0 otherwise.
+    """
+    cdef int point = move + v
+    cdef int connect = 2, i
+    if board[point + v] == opp and board[point + 2 * v] == color:
+        return 1 if own_captures >= 8 else 0
+    for i in range(1, 4):
+        if board[point + v * i] == opp:
+            connect += 1
+        else:
+            break
+    for i in range(2, 4):
+        if board[point - v * i] == opp:
+            connect += 1
+        else:
+            break
+    return 2 if connect >= 5 else 0
+
+
+cdef int _threat_order(SearchState* st, int move, int color) noexcept:
+    """
+    Sort key of move for color, as A4SubmissionPlayer.threat_order:
+    the GoBoard.analyze pattern over the 4 neighbors, 4 if none.
+    A win beats a block, which beats an open four.
+    """
+    cdef int8_t* board = st.board
+    cdef int opp = WHITE + BLACK - color
+    cdef int best = 4, t, k, v
+    for k in range(4):
+        v = NEIGHBOR_DIRS[k]
+        if board[move + v] == color:
+            t = _own_threat(board, move, v, color, opp, st.captures[opp])
+        elif board[move + v] == opp:
+            t = _opp_threat(board, move, v, color, opp, st.captures[color])
+        else:
+            continue
+        if t == 1:
+            return 1
+        if t != 0 and t < best:
+            best = t
+    return best
+
+
+cdef inline TTEntry* _probe(SearchState* st, uint64_t key) noexcept:
+    """
+    The entry for key, or the empty slot where it would be stored
+    """
+    cdef size_t i = key & st.tt_mask
+    while st.tt[i].used and st.tt[i].key != key:
+        i = (i + 1) & st.tt_mask
+    return &st.tt[i]
+
+
+cdef bint _grow(SearchState* st) noexcept:
+    """
+    Double the transposition table. Returns False if out of memory.
+    """
+    cdef TTEntry* old = st.tt
+    cdef size_t old_size = st.tt_mask + 1, i
+    cdef TTEntry* table = <TTEntry*> calloc(2 * old_size, sizeof(TTEntry))
+    if table == NULL:
+        return False
+    st.tt = table
+    st.tt_mask = 2 * old_size - 1
+    for i in range(old_size):
+        if old[i].used:
+            _probe(st, old[i].key)[0] = old[i]
+    free(old)
+    return True
+
+
+cdef void _store(SearchState* st, uint64_t key, int value, int depth,
+                 int flag, int move, bint solved) noexcept:
+    cdef TTEntry* entry = _probe(st, key)
+    if not entry.used:
+        # keep the table at most half full
+        if 2 * (st.tt_count + 1) <= st.tt_mask + 1:
+            st.tt_count += 1
+        elif st.tt_mask + 1 < TT_MAX_SIZE and _grow(st):
+            entry = _probe(st, key)
+            st.tt_count += 1
+        else:
+            # full: replace the entry in the home slot, which keeps
+            # the probe chains of all other keys intact
+            entry = &st.tt[key & st.tt_mask]
+            if entry.solved and not solved:
+                return
+    entry.key = key
+    entry.value = value
+    entry.depth = depth
+    entry.flag = flag
+    entry.move = move
+    entry.solved = solved
+    entry.used = True
+
+
+cdef int _alpha_beta(SearchState* st, int player, int alpha, int beta,
+                     int depth, int max_depth, int last_move, int n_empty,
+                     uint64_t zhash, bint* solved) noexcept:
+    """
+    Negamax alpha-beta with the same semantics as search_jit._alpha_beta.
+    Returns the value and sets solved; a timeout sets st.timeout.
+    """
+    cdef int8_t* board = st.board
+    cdef int winner = EMPTY
+    cdef int remaining, tt_move, n, i, j, p, move, value, alpha_orig, best_move, flag
+    cdef int order, n_empty_points
+    cdef int16_t empty_points[MAXPOINT]
+    cdef int8_t threat[MAXPOINT]
+    cdef int opp = WHITE + BLACK - player
+    cdef bint child_solved, any_unsolved
+    cdef uint64_t child_hash
+    cdef TTEntry* entry
+    cdef int16_t* moves
+
+    st.nodes += 1
+    if st.nodes & TIME_CHECK_MASK == 0 and time.time() > st.deadline:
+        st.timeout = True
+    if st.timeout:
+        solved[0] = False
+        return 0
+
+    if last_move >= 0 and _five_in_a_row(board, last_move):
+        winner = board[last_move]
+    elif st.captures[BLACK] >= 10:
+        winner = BLACK
+    elif st.captures[WHITE] >= 10:
+        winner = WHITE
+    elif n_empty == 0:
+        solved[0] = True
+        return 0
+    if winner != EMPTY:
+        solved[0] = True
+        return 1 if winner == player else -1
+
+    if depth >= max_depth:
+        solved[0] = False
+        return 0
+
+    # solved entries are valid at any depth, see A4SubmissionPlayer.alpha_beta
+    remaining = max_depth - depth
+    tt_move = NO_POINT
+    any_unsolved = False
+    entry = _probe(st, zhash)
+    if entry.used:
+        tt_move = entry.move
+        if depth > 0 and (entry.solved or entry.depth >= remaining):
+            if entry.flag == EXACT:
+                solved[0] = entry.solved
+                return entry.value
+            elif entry.flag == LOWER_BOUND and entry.value > alpha:
+                alpha = entry.value
+                any_unsolved = not entry.solved
+            elif entry.flag == UPPER_BOUND and entry.value < beta:
+                beta = entry.value
+                any_unsolved = not entry.solved
+            if alpha >= beta:
+                solved[0] = entry.solved
+                return entry.value
+
+    # order moves as A4SubmissionPlayer.alpha_beta does: wins, blocks,
+    # open fours, then all other moves, each class in board order,
+    # or at the root by distance to the last move
+    n_empty_points = 0
+    for i in range(SIZE * SIZE if depth == 0 else MAXPOINT):
+        p = st.root_order[i] if depth == 0 else i
+        if board[p] == EMPTY:
+            empty_points[n_empty_points] = p
+            threat[n_empty_points] = _threat_order(st, p, player)
+            n_empty_points += 1
+    moves = st.move_buf[depth]
+    n = 0
+    for order in range(1, 5):
+        for i in range(n_empty_points):
+            if threat[i] == order:
+                moves[n] = empty_points[i]
+                n += 1
+    # then try the transposition table move first
+    if tt_move >= 0:
+        for i in range(n):
+            if moves[i] == tt_move:
+                for j in range(i, 0, -1):
+                    moves[j] = moves[j - 1]
+                moves[0] = tt_move
+                break
+
+    alpha_orig = alpha
+    best_move = NO_POINT
+    for i in range(n):
+        move = moves[i]
+        child_hash = _play(st, move, player, depth, zhash)
+        value = -_alpha_beta(st, opp, -beta, -alpha, depth + 1, max_depth,
+                             move, n_empty - 1 + st.ncap[depth], child_hash,
+                             &child_solved)
+        _undo(st, move, player, depth, child_hash)
+
+        if st.timeout:
+            solved[0] = False
+            return 0
+
+        if not child_solved:
+            any_unsolved = True
+
+        if value > alpha:
+            alpha = value
+            best_move = move
+            if depth == 0:
+                st.best_move = move
+
+        if child_solved and value == 1:
+            _store(st, zhash, 1, remaining, EXACT, move, True)
+            solved[0] = True
+            return 1
+
+        if value >= beta:
+            _store(st, zhash, beta, remaining, LOWER_BOUND, move, child_solved)
+            solved[0] = child_solved
+            return beta
+
+    flag = UPPER_BOUND if alpha <= alpha_orig else EXACT
+    _store(st, zhash, alpha, remaining, flag, best_move, not any_unsolved)
+    solved[0] = not any_unsolved
+    return alpha
+
+
+cdef class Search7:
+    """
+    Compiled alpha-beta search on a 7x7 board, used like search_jit.JitSearch.
+    The board arrays are searched in place and restored after each call.
+    The transposition table is kept across calls,
+    for use in iterative deepening.
+    """
+    cdef SearchState* st
+    cdef object board
+    cdef object order
+    cdef public int best_move
+    cdef readonly long nodes
+
+    def __cinit__(self, board):
+        if board.size != SIZE:
+            raise ValueError("Search7 needs a {0}x{0} board".format(SIZE))
+        self.st = <SearchState*> calloc(1, sizeof(SearchState))
+        if self.st == NULL:
+            raise MemoryError()
+        self.st.tt = <TTEntry*> calloc(TT_INITIAL_SIZE, sizeof(TTEntry))
+        if self.st.tt == NULL:
+            raise MemoryError()
+        self.st.tt_mask = TT_INITIAL_SIZE - 1
+        self.board = board
+        self.order = distance_order(SIZE)
+        self.best_move = NO_POINT
+
+    def __dealloc__(self):
+        if self.st != NULL:
+            free(self.st.tt)
+            free(self.st)
+
+    def alpha_beta(self, int alpha, int beta, int max_depth, double deadline):
+        """
+        Search the root position to max_depth.
+        Returns: value, solved, timeout.
+        The best root move found so far is in self.best_move (NO_POINT if none).
+        """
+        cdef int8_t[::1] board_array = self.board.board
+        cdef const uint64_t[:, ::1] zobrist = self.board.zobrist_table
+        cdef const uint64_t[:, ::1] zobrist_captures = self.board.zobrist_captures
+        cdef int last_move = self.board.last_move
+        # row 0 is off the board, ordered by distance to the center
+        cdef const int32_t[::1] root_order = self.order[max(last_move, 0)]
+        cdef SearchState* st = self.st
+        cdef int p, n_empty = 0, value
+        cdef bint solved
+        st.board = &board_array[0]
+        st.zobrist = &zobrist[0, 0]
+        st.zobrist_captures = &zobrist_captures[0, 0]
+        st.root_order = &root_order[0]
+        st.zobrist_side = self.board.zobrist_side
+        st.captures[BLACK] = self.board.black_captures
+        st.captures[WHITE] = self.board.white_captures
+        st.nodes = 0
+        st.timeout = False
+        st.best_move = NO_POINT
+        st.deadline = deadline
+        for p in range(MAXPOINT):
+            if st.board[p] == EMPTY:
+                n_empty += 1
+        # every line of play ends well within MAX_PLY moves on 7x7
+        max_depth = min(max_depth, MAX_PLY - 1)
+        value = _alpha_beta(st, self.board.current_player, alpha, beta, 0,
+                            max_depth, last_move, n_empty,
+                            self.board.zhash, &solved)
+        self.best_move = st.best_move
+        self.nodes = st.nodes
+        return value, solved, st.timeout
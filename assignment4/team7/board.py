@@ -16,6 +16,7 @@ from typing import List, Tuple
 
 from board_base import (
     board_array_size,
+    point_to_rc_table,
     coord_to_point,
     is_black_white,
     is_black_white_empty,
@@ -30,8 +31,15 @@ from board_base import (
     PASS,
     GO_COLOR,
     GO_POINT,
+    BOARD_DTYPE,
 )
 
+"""
+Seed for the Zobrist keys. Fixed so that copies of a board
+(and boards of the same size) share the same keys.
+"""
+ZOBRIST_SEED: int = 455
+
 
 """
 The GoBoard class implements a board and basic functions to play
@@ -75,36 +83,95 @@ class GoBoard(object):
         self.size: int = size
         self.NS: int = size + 1
         self.WE: int = 1
+        NS = self.NS
+        # the 8 capture directions, built once per board size
+        self._dirs: Tuple[int, ...] = (1, -1, NS, -NS, NS + 1, -(NS + 1), NS - 1, -(NS - 1))
+        self._point_to_rc: Tuple[Tuple[int, int], ...] = point_to_rc_table(size)
         self.last_move: GO_POINT = NO_POINT
         self.last2_move: GO_POINT = NO_POINT
         self.current_player: GO_COLOR = BLACK
         self.maxpoint: int = board_array_size(size)
-        self.board: np.ndarray[GO_POINT] = np.full(self.maxpoint, BORDER, dtype=GO_POINT)
+        self.board: np.ndarray[GO_COLOR] = np.full(self.maxpoint, BORDER, dtype=BOARD_DTYPE)
         self._initialize_empty_points(self.board)
+        self._vacant: set = set(self.get_empty_points().tolist())
+        self._legal_cache: dict = {}
         self.black_captures = 0
         self.white_captures = 0
         self.depth = 0
         self.black_capture_history = []
         self.white_capture_history = []
         self.move_history = []
+        self._init_zobrist()
+
+    def _init_zobrist(self) -> None:
+        """
+        Random 64-bit keys for incremental Zobrist hashing:
+        one per (point, color), one per (color, capture count)
+        and one for the side to move.
+        self.zhash is the hash of the current position.
+        """
+        rng = np.random.default_rng(ZOBRIST_SEED)
+        self.zobrist_table: np.ndarray = rng.integers(
+            0, 2**64, size=(self.maxpoint, 3), dtype=np.uint64, endpoint=False)
+        self.zobrist_captures: np.ndarray = rng.integers(
+            0, 2**64, size=(3, self.maxpoint + 1), dtype=np.uint64, endpoint=False)
+        self.zobrist_side: np.uint64 = rng.integers(0, 2**64, dtype=np.uint64, endpoint=False)
+        self.zhash: np.uint64 = self.compute_zhash()
+
+    def compute_zhash(self) -> np.uint64:
+        """
+        Hash of the current position computed from scratch.
+        """
+        h = np.uint64(0)
+        for point in where1d((self.board == BLACK) | (self.board == WHITE)):
+            h ^= self.zobrist_table[point, self.board[point]]
+        h ^= self.zobrist_captures[BLACK, self.black_captures]
+        h ^= self.zobrist_captures[WHITE, self.white_captures]
+        if self.current_player == WHITE:
+            h ^= self.zobrist_side
+        return h
 
     def copy(self) -> 'GoBoard':
-        b = GoBoard(self.size)
-        assert b.NS == self.NS
-        assert b.WE == self.WE
+        """
+        Copy of the position, made without GoBoard(size): that would build
+        an empty board and regenerate the Zobrist keys only to overwrite them.
+        The per-size tables and Zobrist keys are never modified, so they are
+        shared; only the stone array and the move histories are copied.
+        """
+        b = GoBoard.__new__(GoBoard)
+        b.size = self.size
+        b.NS = self.NS
+        b.WE = self.WE
+        b._dirs = self._dirs
+        b._point_to_rc = self._point_to_rc
         b.last_move = self.last_move
         b.last2_move = self.last2_move
         b.current_player = self.current_player
-        assert b.maxpoint == self.maxpoint
-        b.board = np.copy(self.board)
+        b.maxpoint = self.maxpoint
+        b.board = self.board.copy()
+        b._vacant = set(self._vacant)
+        b._legal_cache = {}
         b.black_captures = self.black_captures
         b.white_captures = self.white_captures
         b.depth = self.depth
         b.black_capture_history = self.black_capture_history.copy()
         b.white_capture_history = self.white_capture_history.copy()
         b.move_history = self.move_history.copy()
+        b.zobrist_table = self.zobrist_table
+        b.zobrist_captures = self.zobrist_captures
+        b.zobrist_side = self.zobrist_side
+        b.zhash = self.zhash
         return b
 
+    def point_to_coord(self, point: GO_POINT) -> Tuple[int, int]:
+        """
+        Transform point to (row, col) with a table lookup instead of divmod.
+        Special case: PASS is transformed to (PASS,PASS)
+        """
+        if point == PASS:
+            return (PASS, PASS)
+        return self._point_to_rc[point]
+
     def get_color(self, point: GO_POINT) -> GO_COLOR:
         return self.board[point]
 
@@ -113,19 +180,27 @@ class GoBoard(object):
 
     def is_legal(self, point: GO_POINT, color: GO_COLOR) -> bool:
         """
-        Check whether it is legal for color to play on point
-        This method tries to play the move on a temporary copy of the board.
-        This prevents the board from being modified by the move
+        Check whether it is legal for color to play on point.
+        In Ninuki every empty point is legal, so this only checks
+        that point is empty.
         """
         if point == PASS:
             return True
-        #board_copy: GoBoard = self.copy()
-        #can_play_move = board_copy.play_move(point, color)
-        #return can_play_move
         return self.board[point] == EMPTY
 
+    def legal_moves(self, color: GO_COLOR) -> List[GO_POINT]:
+        """
+        Sorted list of the legal moves of color, not including PASS.
+        Cached until the board changes; do not modify the returned list.
+        """
+        moves = self._legal_cache.get(color)
+        if moves is None:
+            moves = sorted(self._vacant)
+            self._legal_cache[color] = moves
+        return moves
+
     def end_of_game(self) -> bool:
-        return self.get_empty_points().size == 0 or (self.last_move == PASS and self.last2_move == PASS)
+        return not self._vacant or (self.last_move == PASS and self.last2_move == PASS)
            
     def get_empty_points(self) -> np.ndarray:
         """
@@ -158,17 +233,24 @@ class GoBoard(object):
         if self.board[point] != EMPTY:
             return False
         self.board[point] = color
+        self._vacant.discard(point)
+        self._legal_cache.clear()
         self.current_player = opponent(color)
         self.last2_move = self.last_move
         self.last_move = point
         O = opponent(color)
-        offsets = [1, -1, self.NS, -self.NS, self.NS+1, -(self.NS+1), self.NS-1, -self.NS+1]
+        zobrist = self.zobrist_table
+        h = self.zhash ^ zobrist[point, color] ^ self.zobrist_side
+        old_captures = self.get_captures(color)
         bcs = []
         wcs = []
-        for offset in offsets:
+        for offset in self._dirs:
             if self.board[point+offset] == O and self.board[point+(offset*2)] == O and self.board[point+(offset*3)] == color:
                 self.board[point+offset] = EMPTY
                 self.board[point+(offset*2)] = EMPTY
+                self._vacant.add(point+offset)
+                self._vacant.add(point+(offset*2))
+                h ^= zobrist[point+offset, O] ^ zobrist[point+(offset*2), O]
                 if color == BLACK:
                     self.black_captures += 2
                     bcs.append(point+offset)
@@ -177,6 +259,10 @@ class GoBoard(object):
                     self.white_captures += 2
                     wcs.append(point+offset)
                     wcs.append(point+(offset*2))
+        new_captures = self.get_captures(color)
+        if new_captures != old_captures:
+            h ^= self.zobrist_captures[color, old_captures] ^ self.zobrist_captures[color, new_captures]
+        self.zhash = h
         self.depth += 1
         self.black_capture_history.append(bcs)
         self.white_capture_history.append(wcs)
@@ -184,17 +270,32 @@ class GoBoard(object):
         return True
     
     def undo(self):
-        self.board[self.move_history.pop()] = EMPTY
+        zobrist = self.zobrist_table
+        point = self.move_history.pop()
+        color = self.board[point]
+        h = self.zhash ^ zobrist[point, color] ^ self.zobrist_side
+        self.board[point] = EMPTY
+        self._vacant.add(point)
+        self._legal_cache.clear()
         self.current_player = opponent(self.current_player)
         self.depth -= 1
+        old_captures = self.get_captures(color)
         bcs = self.black_capture_history.pop()
         for point in bcs:
             self.board[point] = WHITE
+            self._vacant.discard(point)
             self.black_captures -= 1
+            h ^= zobrist[point, WHITE]
         wcs = self.white_capture_history.pop()
         for point in wcs:
             self.board[point] = BLACK
+            self._vacant.discard(point)
             self.white_captures -= 1
+            h ^= zobrist[point, BLACK]
+        new_captures = self.get_captures(color)
+        if new_captures != old_captures:
+            h ^= self.zobrist_captures[color, old_captures] ^ self.zobrist_captures[color, new_captures]
+        self.zhash = h
         if len(self.move_history) > 0:
             self.last_move = self.move_history[-1]
         if len(self.move_history) > 1:
@@ -10,7 +10,6 @@ at the University of Edinburgh.
 """
 import traceback
 import numpy as np
-import re
 import time
 from sys import stdin, stdout, stderr
 from typing import Any, Callable, Dict, List, Tuple
@@ -30,6 +29,11 @@ from board import GoBoard
 from board_util import GoBoardUtil
 from engine import GoEngine
 
+"""
+Translation table from board colors to the characters of gogui-rules_board
+"""
+BOARD_CHARS = bytes.maketrans(bytes([BLACK, WHITE, EMPTY, BORDER]), b"XO.\n")
+
 class GtpConnection:
     def __init__(self, engine: GoEngine, board: GoBoard, debug_mode: bool = False) -> None:
         """
@@ -99,6 +103,9 @@ class GtpConnection:
         Start a GTP connection. 
         This function continuously monitors standard input for commands.
         """
+        # with line buffering every complete response line is flushed
+        # by the stream itself, so respond and error need no flush
+        stdout.reconfigure(line_buffering=True, write_through=True)
         line = stdin.readline()
         while line:
             self.get_cmd(line)
@@ -114,7 +121,11 @@ class GtpConnection:
             return
         # Strip leading numbers from regression tests
         if command[0].isdigit():
-            command = re.sub("^\d+", "", command).lstrip()
+            i = 1
+            n = len(command)
+            while i < n and command[i].isdigit():
+                i += 1
+            command = command[i:].lstrip()
 
         elements: List[str] = command.split()
         if not elements:
@@ -133,7 +144,6 @@ class GtpConnection:
         else:
             self.debug_msg("Unknown command: {}\n".format(command_name))
             self.error("Unknown command")
-            stdout.flush()
 
     def has_arg_error(self, cmd: str, argnum: int) -> bool:
         """
@@ -154,12 +164,10 @@ class GtpConnection:
     def error(self, error_msg: str) -> None:
         """ Send error msg to stdout """
         stdout.write("? {}\n\n".format(error_msg))
-        stdout.flush()
 
     def respond(self, response: str = "") -> None:
         """ Send response to stdout """
         stdout.write("= {}\n\n".format(response))
-        stdout.flush()
 
     def reset(self, size: int) -> None:
         """
@@ -177,6 +185,7 @@ class GtpConnection:
     def quit_cmd(self, args: List[str]) -> None:
         """ Quit game and exit the GTP interface """
         self.respond()
+        stdout.flush()
         exit()
 
     def name_cmd(self, args: List[str]) -> None:
@@ -229,12 +238,9 @@ class GtpConnection:
         board_color: str = args[0].lower()
         color: GO_COLOR = color_to_int(board_color)
         moves: List[GO_POINT] = GoBoardUtil.generate_legal_moves(self.board, color)
-        gtp_moves: List[str] = []
-        for move in moves:
-            coords: Tuple[int, int] = point_to_coord(move, self.board.size)
-            gtp_moves.append(format_point(coords))
-        sorted_moves = " ".join(sorted(gtp_moves))
-        self.respond(sorted_moves)
+        gtp_moves: List[str] = [format_point(self.board.point_to_coord(move))
+                                for move in sort_points(moves, self.board.size)]
+        self.respond(" ".join(gtp_moves))
 
     def gogui_analyze_cmd(self, args: List[str]) -> None:
         """ We already implemented this function for Assignment 2 """
@@ -262,22 +268,12 @@ class GtpConnection:
     def gogui_rules_board_cmd(self, args: List[str]) -> None:
         """ We already implemented this function for Assignment 2 """
         size = self.board.size
-        str = ''
-        for row in range(size-1, -1, -1):
-            start = self.board.row_start(row + 1)
-            for i in range(size):
-                #str += '.'
-                point = self.board.board[start + i]
-                if point == BLACK:
-                    str += 'X'
-                elif point == WHITE:
-                    str += 'O'
-                elif point == EMPTY:
-                    str += '.'
-                else:
-                    assert False
-            str += '\n'
-        self.respond(str)
+        NS = self.board.NS
+        # each row of size points is followed by the BORDER point
+        # that pads the next row, which is translated to the newline
+        rows = self.board.board[NS + 1 : (size + 1) * NS + 1].reshape(size, NS)
+        text = rows[::-1].tobytes().translate(BOARD_CHARS)
+        self.respond(text.decode("ascii"))
 
     def gogui_rules_final_result_cmd(self, args: List[str]) -> None:
         """ We already implemented this function for Assignment 2 """
@@ -306,12 +302,9 @@ class GtpConnection:
             self.respond("")
             return
         legal_moves = self.board.get_empty_points()
-        gtp_moves: List[str] = []
-        for move in legal_moves:
-            coords: Tuple[int, int] = point_to_coord(move, self.board.size)
-            gtp_moves.append(format_point(coords))
-        sorted_moves = " ".join(sorted(gtp_moves))
-        self.respond(sorted_moves)
+        gtp_moves: List[str] = [format_point(self.board.point_to_coord(move))
+                                for move in sort_points(legal_moves, self.board.size)]
+        self.respond(" ".join(gtp_moves))
 
     def play_cmd(self, args: List[str]) -> None:
         """ We already implemented this function for Assignment 2 """
@@ -389,18 +382,33 @@ def point_to_coord(point: GO_POINT, boardsize: int) -> Tuple[int, int]:
         return divmod(point, NS)
 
 
+def sort_points(points: List[GO_POINT], boardsize: int) -> np.ndarray:
+    """
+    Sort points in GTP order, by column and then by row.
+    Sorts on the integer points, so that e.g. A2 comes before A10.
+    """
+    points = np.asarray(points, dtype=GO_POINT)
+    NS = boardsize + 1
+    return points[np.lexsort((points, points % NS))]
+
+
+"""
+Column letters used in GTP coordinates. There is no 'I' column.
+"""
+assert MAXSIZE <= 25
+COLUMN_LETTERS = "ABCDEFGHJKLMNOPQRSTUVWXYZ"
+
 def format_point(move: Tuple[int, int]) -> str:
     """
     Return move coordinates as a string such as 'A1', or 'PASS'.
     """
-    assert MAXSIZE <= 25
-    column_letters = "ABCDEFGHJKLMNOPQRSTUVWXYZ"
     if move[0] == PASS:
         return "PASS"
     row, col = move
-    if not 0 <= row < MAXSIZE or not 0 <= col < MAXSIZE:
-        raise ValueError
-    return column_letters[col - 1] + str(row)
+    if __debug__:
+        if not 0 <= row < MAXSIZE or not 0 <= col < MAXSIZE:
+            raise ValueError
+    return COLUMN_LETTERS[col - 1] + str(row)
 
 
 def move_to_coord(point_str: str, board_size: int) -> Tuple[int, int]:
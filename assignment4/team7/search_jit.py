@@ -0,0 +1,397 @@
+"""
+search_jit.py
+Numba-compiled alpha-beta search for Ninuki.
+
+The recursion works directly on the arrays of a GoBoard (board, Zobrist
+keys, capture counts) with preallocated move and capture stacks,
+so no Python objects are created inside the search.
+Numba is optional: if it is not installed NUMBA_AVAILABLE is False
+and A4SubmissionPlayer uses its Python alpha_beta instead.
+"""
+
+import time
+import numpy as np
+
+from board_base import BLACK, WHITE, EMPTY, NO_POINT, distance_order
+from board import GoBoard
+
+try:
+    import numba
+    from numba import njit, types
+    from numba.typed import Dict
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda f: f
+
+"""
+Transposition table entry flags, same meaning as in Ninuki.py
+"""
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+"""
+Check the clock only every (TIME_CHECK_MASK + 1) nodes,
+since leaving compiled code to call time.time() is expensive.
+"""
+TIME_CHECK_MASK = 1023
+
+"""
+Most stones a single move can capture: 2 in each of 8 directions
+"""
+MAX_CAPTURED = 16
+
+"""
+Upper estimate of the seconds Numba needs to compile _alpha_beta.
+It is compiled on first use, in every process, since it cannot be cached.
+"""
+COMPILE_TIME = 10.0
+
+# indices into the stats array shared with the Python side
+NODES = 0
+BEST_MOVE = 1
+TIMEOUT = 2
+
+
+@njit(cache=True)
+def _play(board, point, color, dirs, captures, cap_stack, ncap, ply,
+          zobrist, zobrist_captures, zobrist_side, zhash):
+    """
+    Play color on point, remove captured pairs and record them
+    in cap_stack[ply]. Returns the new Zobrist hash.
+    """
+    opp = WHITE + BLACK - color
+    board[point] = color
+    h = zhash ^ zobrist[point, color] ^ zobrist_side
+    n = 0
+    for d in dirs:
+        p1 = point + d
+        p2 = p1 + d
+        if board[p1] == opp and board[p2] == opp and board[p2 + d] == color:
+            board[p1] = EMPTY
+            board[p2] = EMPTY
+            h ^= zobrist[p1, opp] ^ zobrist[p2, opp]
+            cap_stack[ply, n] = p1
+            cap_stack[ply, n + 1] = p2
+            n += 2
+    ncap[ply] = n
+    if n > 0:
+        old = captures[color]
+        captures[color] = old + n
+        h ^= zobrist_captures[color, old] ^ zobrist_captures[color, old + n]
+    return h
+
+
+@njit(cache=True)
+def _undo(board, point, color, captures, cap_stack, ncap, ply,
+          zobrist, zobrist_captures, zobrist_side, zhash):
+    """
+    Take back the move of color on point played by _play at ply.
+    Returns the restored Zobrist hash.
+    """
+    opp = WHITE + BLACK - color
+    board[point] = EMPTY
+    h = zhash ^ zobrist[point, color] ^ zobrist_side
+    n = ncap[ply]
+    for i in range(n):
+        p = cap_stack[ply, i]
+        board[p] = opp
+        h ^= zobrist[p, opp]
+    if n > 0:
+        old = captures[color]
+        captures[color] = old - n
+        h ^= zobrist_captures[color, old] ^ zobrist_captures[color, old - n]
+    return h
+
+
+@njit(cache=True)
+def _five_in_a_row(board, point, NS):
+    """
+    Whether the stone on point is part of five or more in a row
+    """
+    c = board[point]
+    for d in (1, NS, NS + 1, NS - 1):
+        num_found = 1
+        p = point + d
+        while board[p] == c:
+            num_found += 1
+            p += d
+        p = point - d
+        while board[p] == c:
+            num_found += 1
+            p -= d
+        if num_found >= 5:
+            return True
+    return False
+
+
+@njit(cache=True)
+def _own_threat(board, move, v, color, opp, opp_captures):
+    """
+    Threat of move next to its own stone on move + v, as in GoBoard.analyze:
+    1 for five in a row, 2 for blocking a capture that would let the
+    opponent win, 3 for an open four, 0 otherwise.
+    """
+    point = move + v
+    connect = 2
+    slot = 0
+    pattern = 0
+    for i in range(1, 4):
+        test = board[point + v * i]
+        if test == color:
+            connect += 1
+        else:
+            if test == EMPTY:
+                slot += 1
+            break
+    for i in range(2, 4):
+        test = board[point - v * i]
+        if test == color:
+            connect += 1
+        else:
+            if test == EMPTY:
+                slot += 1
+            break
+    if connect >= 5:
+        return 1
+    elif connect == 4 and slot == 2:
+        pattern = 3
+    if board[point + v] == color and board[point + 2 * v] == opp \
+            and opp_captures >= 8:
+        pattern = 2
+    return pattern
+
+
+@njit(cache=True)
+def _opp_threat(board, move, v, color, opp, own_captures):
+    """
+    Threat of move next to an opponent stone on move + v, as in
+    GoBoard.analyze: 1 for a winning capture, 2 for blocking five, 0 otherwise.
+    """
+    point = move + v
+    if board[point + v] == opp and board[point + 2 * v] == color:
+        return 1 if own_captures >= 8 else 0
+    connect = 2
+    for i in range(1, 4):
+        if board[point + v * i] == opp:
+            connect += 1
+        else:
+            break
+    for i in range(2, 4):
+        if board[point - v * i] == opp:
+            connect += 1
+        else:
+            break
+    return 2 if connect >= 5 else 0
+
+
+@njit(cache=True)
+def _threat_order(board, move, color, NS, captures):
+    """
+    Sort key of move for color, as A4SubmissionPlayer.threat_order:
+    the GoBoard.analyze pattern over the 4 neighbors, 4 if none.
+    A win beats a block, which beats an open four.
+    """
+    opp = WHITE + BLACK - color
+    best = 4
+    for v in (-1, 1, -NS, NS):
+        if board[move + v] == color:
+            t = _own_threat(board, move, v, color, opp, captures[opp])
+        elif board[move + v] == opp:
+            t = _opp_threat(board, move, v, color, opp, captures[color])
+        else:
+            continue
+        if t == 1:
+            return 1
+        if t != 0 and t < best:
+            best = t
+    return best
+
+
+# not cached: Numba cannot cache functions that use objmode
+@njit
+def _alpha_beta(board, NS, player, alpha, beta, depth, max_depth,
+                last_move, n_empty, captures, dirs, root_order, order_buf,
+                move_buf, cap_stack, ncap,
+                zobrist, zobrist_captures, zobrist_side, zhash,
+                tt, stats, deadline):
+    """
+    Negamax alpha-beta with the same semantics as
+    A4SubmissionPlayer.alpha_beta. Returns (value, solved);
+    a timeout is reported through stats[TIMEOUT].
+    """
+    stats[NODES] += 1
+    if stats[NODES] & TIME_CHECK_MASK == 0:
+        with numba.objmode(now='float64'):
+            now = time.time()
+        if now > deadline:
+            stats[TIMEOUT] = 1
+    if stats[TIMEOUT]:
+        return 0, False
+
+    winner = EMPTY
+    if last_move >= 0 and _five_in_a_row(board, last_move, NS):
+        winner = board[last_move]
+    elif captures[BLACK] >= 10:
+        winner = BLACK
+    elif captures[WHITE] >= 10:
+        winner = WHITE
+    elif n_empty == 0:
+        return 0, True
+    if winner != EMPTY:
+        if winner == player:
+            return 1, True
+        return -1, True
+
+    if depth >= max_depth:
+        return 0, False
+
+    # solved entries are valid at any depth, see A4SubmissionPlayer.alpha_beta
+    remaining = max_depth - depth
+    tt_move = -1
+    any_unsolved = False
+    if zhash in tt:
+        tt_value, tt_depth, tt_flag, tt_move, tt_solved = tt[zhash]
+        if depth > 0 and (tt_solved == 1 or tt_depth >= remaining):
+            if tt_flag == EXACT:
+                return tt_value, tt_solved == 1
+            elif tt_flag == LOWER_BOUND and tt_value > alpha:
+                alpha = tt_value
+                any_unsolved = tt_solved == 0
+            elif tt_flag == UPPER_BOUND and tt_value < beta:
+                beta = tt_value
+                any_unsolved = tt_solved == 0
+            if alpha >= beta:
+                return tt_value, tt_solved == 1
+
+    # order moves as A4SubmissionPlayer.alpha_beta does: wins, blocks,
+    # open fours, then all other moves, each class in board order,
+    # or at the root by distance to the last move
+    empty_points = order_buf[0]
+    threat = order_buf[1]
+    n_empty_points = 0
+    for i in range(root_order.shape[0] if depth == 0 else board.shape[0]):
+        p = root_order[i] if depth == 0 else i
+        if board[p] == EMPTY:
+            empty_points[n_empty_points] = p
+            threat[n_empty_points] = _threat_order(board, p, player, NS, captures)
+            n_empty_points += 1
+    moves = move_buf[depth]
+    n = 0
+    for t in range(1, 5):
+        for i in range(n_empty_points):
+            if threat[i] == t:
+                moves[n] = empty_points[i]
+                n += 1
+    # then try the transposition table move first
+    if tt_move >= 0:
+        for i in range(n):
+            if moves[i] == tt_move:
+                for j in range(i, 0, -1):
+                    moves[j] = moves[j - 1]
+                moves[0] = tt_move
+                break
+
+    alpha_orig = alpha
+    best_move = -1
+    opp = WHITE + BLACK - player
+    for i in range(n):
+        move = moves[i]
+        child_hash = _play(board, move, player, dirs, captures, cap_stack, ncap,
+                           depth, zobrist, zobrist_captures, zobrist_side, zhash)
+        value, solved = _alpha_beta(board, NS, opp, -beta, -alpha, depth + 1,
+                                    max_depth, move, n_empty - 1 + ncap[depth],
+                                    captures, dirs, root_order, order_buf,
+                                    move_buf, cap_stack, ncap,
+                                    zobrist, zobrist_captures, zobrist_side,
+                                    child_hash, tt, stats, deadline)
+        _undo(board, move, player, captures, cap_stack, ncap, depth,
+              zobrist, zobrist_captures, zobrist_side, child_hash)
+        value = -value
+
+        if stats[TIMEOUT]:
+            return 0, False
+
+        if not solved:
+            any_unsolved = True
+
+        if value > alpha:
+            alpha = value
+            best_move = move
+            if depth == 0:
+                stats[BEST_MOVE] = move
+
+        if solved and value == 1:
+            tt[zhash] = (1, remaining, EXACT, move, 1)
+            return 1, True
+
+        if value >= beta:
+            tt[zhash] = (beta, remaining, LOWER_BOUND, move, 1 if solved else 0)
+            return beta, solved
+
+    flag = UPPER_BOUND if alpha <= alpha_orig else EXACT
+    tt[zhash] = (alpha, remaining, flag, best_move, 0 if any_unsolved else 1)
+    return alpha, not any_unsolved
+
+
+def is_compiled() -> bool:
+    """
+    Whether _alpha_beta has been compiled in this process
+    """
+    return len(_alpha_beta.signatures) > 0
+
+
+class JitSearch(object):
+    def __init__(self, board: GoBoard) -> None:
+        """
+        Compiled alpha-beta search on board.
+        The board arrays are searched in place and restored after each call.
+        The transposition table is kept across calls,
+        for use in iterative deepening.
+        """
+        assert NUMBA_AVAILABLE
+        self.board = board
+        self.dirs = np.array(board._dirs, dtype=np.int64)
+        self.captures = np.zeros(3, dtype=np.int64)
+        # empty points and their threat classes, while ordering one node
+        self.order_buf = np.zeros((2, board.maxpoint), dtype=np.int64)
+        self._allocate_stacks(board.get_empty_points().size + 1)
+        self.stats = np.zeros(3, dtype=np.int64)
+        self.tt = Dict.empty(key_type=types.uint64,
+                             value_type=types.UniTuple(types.int64, 5))
+
+    def _allocate_stacks(self, max_ply: int) -> None:
+        """
+        Per-ply move lists and captured stones for searches up to max_ply
+        """
+        self.move_buf = np.zeros((max_ply, self.board.maxpoint), dtype=np.int64)
+        self.cap_stack = np.zeros((max_ply, MAX_CAPTURED), dtype=np.int64)
+        self.ncap = np.zeros(max_ply, dtype=np.int64)
+
+    def alpha_beta(self, alpha: int, beta: int, max_depth: int, deadline: float):
+        """
+        Search the root position to max_depth.
+        Returns: value, solved, timeout.
+        The best root move found so far is in self.best_move (NO_POINT if none).
+        """
+        board = self.board
+        if max_depth >= len(self.ncap):
+            # captures free points, so games can be longer than the empty count
+            self._allocate_stacks(max_depth + 1)
+        self.captures[BLACK] = board.black_captures
+        self.captures[WHITE] = board.white_captures
+        self.stats[:] = 0
+        self.stats[BEST_MOVE] = NO_POINT
+        value, solved = _alpha_beta(
+            board.board, board.NS, board.current_player, alpha, beta, 0, max_depth,
+            board.last_move, board.get_empty_points().size, self.captures, self.dirs,
+            # row 0 is off the board, ordered by distance to the center
+            distance_order(board.size)[max(board.last_move, 0)], self.order_buf,
+            self.move_buf, self.cap_stack, self.ncap,
+            board.zobrist_table, board.zobrist_captures, board.zobrist_side,
+            board.zhash, self.tt, self.stats, deadline)
+        self.best_move = self.stats[BEST_MOVE]
+        return value, solved, bool(self.stats[TIMEOUT])
@@ -0,0 +1,17 @@
+"""
+setup.py
+Builds the optional Cython search _ninuki7.pyx in place:
+    python setup.py build_ext --inplace
+Ninuki.py runs without it, see _ninuki7.pyx.
+"""
+
+from setuptools import Extension, setup
+from Cython.Build import cythonize
+
+setup(
+    name="ninuki7",
+    ext_modules=cythonize(
+        [Extension("_ninuki7", ["_ninuki7.pyx"], extra_compile_args=["-O3"])],
+        language_level=3,
+    ),
+)
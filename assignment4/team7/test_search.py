@@ -0,0 +1,168 @@
+"""
+test_search.py
+Regression tests for the alpha-beta searches of A4SubmissionPlayer.
+
+Run from this directory with
+    python -m unittest test_search
+"""
+
+import time
+import unittest
+
+from board import GoBoard
+from board_base import coord_to_point
+from gtp_connection import move_to_coord
+from Ninuki import A4SubmissionPlayer, Search7
+from search_jit import NUMBA_AVAILABLE, JitSearch
+
+"""
+5x5 positions after the given moves, Black to move, with the
+result of solve_board found by an exhaustive search.
+"""
+SOLVED_5X5 = [
+    # Black wins with e1. Bounds of depth-limited beta cutoffs were
+    # stored as solved, and the search answered "draw".
+    ("b4 a1 a5 c4 b2 d5 d4 b1 b3 c1 a4 e2 c3 c2 a3 c5", "b"),
+    ("e1 d5 c1 e5 e3 a3 b4 d2 d1 a4 b2 a2 e2 c5 d3 b3", "draw"),
+    ("d2 c2 b4 c4 b5 b1 e1 b3 e5 d5 b2 a4 e3 c1 e2 e4", "draw"),
+    ("b1 e2 d1 b4 b3 a2 c1 e4 c4 d4 d5 a1 c2 d2 e3 c5", "draw"),
+]
+
+"""
+7x7 positions, Black to move, where the Cython search answered "draw"
+while Black wins, for the same reason as above
+"""
+BLACK_WINS_7X7 = [
+    "g5 e3 g6 b1 b7 e7 a3 f3 e1 c5 b5 d2 a2 e6 a1 g7 c4 d1 "
+    "g1 f2 c7 d7 f5 a5 d4 b6 g3 e5 b2 e4 c1 d3 f7 a4 c6 f2",
+    "g2 d3 f4 b1 a3 e3 d5 b7 a1 b4 c5 b3 d1 a5 a2 c6 c1 e2 "
+    "e4 c4 b5 e7 d7 b2 e5 d6 g6 a4 g3 g1 f6 e6 e4 f5 e1 c2",
+]
+
+
+def play_moves(size: int, moves: str) -> GoBoard:
+    """
+    Board of the given size after playing moves, alternating colors from Black
+    """
+    board = GoBoard(size)
+    for move in moves.split():
+        point = coord_to_point(*move_to_coord(move, size), size)
+        board.play_move(point, board.current_player)
+    return board
+
+
+def search_player(board: GoBoard) -> A4SubmissionPlayer:
+    """
+    Player set up as solve_board does for searching board
+    """
+    player = A4SubmissionPlayer()
+    player.board = board
+    player.tt = {}
+    player.root_pv = []
+    player.node_count = 0
+    player.timed_out = False
+    player.deadline = time.time() + 600
+    return player
+
+
+def deepening_results(board: GoBoard, search_class=None) -> list:
+    """
+    (value, solved) of each iterative deepening step of solve_board
+    on board, until solved, with a compiled search_class
+    or the Python search if None
+    """
+    player = search_player(board)
+    search = search_class(board) if search_class is not None else None
+    results = []
+    solved = False
+    player.max_depth = 1
+    while not solved:
+        if search is not None:
+            value, solved, _ = search.alpha_beta(-1, 1, player.max_depth, player.deadline)
+        else:
+            value, solved, _ = player.alpha_beta(-1, 1, 0)
+            player.root_pv = player.principal_variation()
+        results.append((value, solved))
+        player.max_depth += 1
+    return results
+
+
+def first_root_move(board: GoBoard, search_class=None) -> int:
+    """
+    Best move of a depth 1 search of board, where no move is proven
+    and every move has the same value, so it is the first root move
+    """
+    player = search_player(board)
+    player.max_depth = 1
+    if search_class is not None:
+        search = search_class(board)
+        search.alpha_beta(-1, 1, 1, player.deadline)
+        return search.best_move
+    player.alpha_beta(-1, 1, 0)
+    return player.best_move
+
+
+class RootOrderTest(unittest.TestCase):
+    """
+    Root moves of the same threat class are ordered by distance to the
+    last move, or to the center of an empty board
+    """
+    def assert_root_order(self, search_class=None) -> None:
+        size = 7 if search_class is Search7 else 5
+        center = (size + 1) // 2
+        board = GoBoard(size)
+        self.assertEqual(first_root_move(board, search_class),
+                         coord_to_point(center, center, size))
+        board = play_moves(size, "a1")
+        row, col = board.point_to_coord(first_root_move(board, search_class))
+        self.assertEqual(max(row, col), 2)
+
+    def test_python_search(self):
+        self.assert_root_order()
+
+    @unittest.skipUnless(NUMBA_AVAILABLE, "Numba is not installed")
+    def test_jit_search(self):
+        self.assert_root_order(JitSearch)
+
+    @unittest.skipIf(Search7 is None, "_ninuki7 is not built")
+    def test_search7(self):
+        self.assert_root_order(Search7)
+
+
+class PythonSearchTest(unittest.TestCase):
+    def test_solve_board(self):
+        for moves, result in SOLVED_5X5:
+            with self.subTest(moves=moves):
+                player = A4SubmissionPlayer()
+                player.compiled_search = lambda: None
+                self.assertEqual(player.solve_board(play_moves(5, moves))[0], result)
+
+
+class CompiledSearchTest(unittest.TestCase):
+    """
+    The compiled searches find the same value as the Python search
+    at each depth. Move ordering decides at which depth a position is
+    proven, so only the last step is compared for the solved flag.
+    """
+    def assert_same_results(self, size: int, moves: str, search_class) -> None:
+        python = deepening_results(play_moves(size, moves))
+        compiled = deepening_results(play_moves(size, moves), search_class)
+        depth = min(len(python), len(compiled))
+        self.assertEqual([v for v, _ in python[:depth]], [v for v, _ in compiled[:depth]])
+        self.assertEqual(python[-1], compiled[-1])
+
+    @unittest.skipUnless(NUMBA_AVAILABLE, "Numba is not installed")
+    def test_jit_search(self):
+        for moves, _ in SOLVED_5X5:
+            with self.subTest(moves=moves):
+                self.assert_same_results(5, moves, JitSearch)
+
+    @unittest.skipIf(Search7 is None, "_ninuki7 is not built")
+    def test_search7(self):
+        for moves in BLACK_WINS_7X7:
+            with self.subTest(moves=moves):
+                self.assert_same_results(7, moves, Search7)
+
+
+if __name__ == "__main__":
+    unittest.main()